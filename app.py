@@ -1,32 +1,113 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
+import time
+
+# Before the other imports, for the startup timing
+START_TIME = time.perf_counter()
+
 import csv
-import copy
+import os
 import argparse
-import itertools
-from collections import Counter
-from collections import deque
 import asyncio
+import importlib
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 
 import cv2 as cv
 import numpy as np
-import mediapipe as mp
 
 from utils import CvFpsCalc
 from utils import ArtnetHandler
+from utils import load_channel_map
+from utils import default_channel_map
+from utils import VideoReplay
+from utils import LandmarkReplay
+from utils import DatasetWriter
+from utils import DetectionScheduler
+from utils import FramePreprocessor
+from utils import mirror_results
+from utils import Metrics
+from utils import MetricsServer
+from utils import MetricsDumper
+from utils import EventLog
+from utils import CameraWorker
+from utils import StartupTimer
+from utils import OneEuroFilter
+from utils import KalmanFilter
+from utils import RingBuffer
+from utils import StageTimer
+from utils import CaptureThread
+from utils import StageThread
+from utils import AsyncOutputThread
+from utils import ZipBuffer
+from utils import install_shutdown_handler
+from utils import landmarks_to_array
+from utils import calc_landmark_points
+from utils import calc_bounding_rect
+from utils import pre_process_landmark
+from utils import pre_process_point_history
+from utils import PointHistory
+from utils import ModeVote
+from utils import GestureDebouncer
+from utils import HandSlots
 from model import KeyPointClassifier
 from model import PointHistoryClassifier
-import time
+from model import BACKENDS
+from model import QUANTIZATIONS
+
+# Stand-in when no histograms are recorded
+NO_METRICS = Metrics(enabled=False)
+
+
+def parse_device(value):
+    # Camera number or path of a video file
+    return int(value) if value.isdigit() else value
+
+
+# Training data written in the logging modes (k: 1, h: 2) and its row width
+DATASET_PATHS = {
+    1: ("model/keypoint_classifier/keypoint.csv", 21 * 2),
+    2: ("model/point_history_classifier/point_history.csv", 16 * 2),
+}
 
 
-def get_args():
+def get_args(argv=None):
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("--device", type=int, default=1)
+    parser.add_argument(
+        "--device",
+        help="Camera device number(s), video file(s) or .npz landmark stream(s); "
+        "hands from all sources are classified together",
+        type=parse_device,
+        nargs="+",
+        default=[1],
+    )
+    parser.add_argument(
+        "--landmark_cache",
+        help="Run the classifiers and Art-Net output directly on a landmark cache "
+        "(see tools/extract_landmarks.py), without capture, MediaPipe or window",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--replay_speed",
+        help="Pace video files / .npz landmark streams in real time or read them as fast as possible",
+        choices=("realtime", "max"),
+        default="realtime",
+    )
     parser.add_argument("--width", help="cap width", type=int, default=720)
     parser.add_argument("--height", help="cap height", type=int, default=480)
+    parser.add_argument(
+        "--inference_width",
+        help="Downscale frames to this width for MediaPipe (0: capture width)",
+        type=int,
+        default=0,
+    )
 
     parser.add_argument("--use_static_image_mode", action="store_true")
+    parser.add_argument(
+        "--max_num_hands", help="max_num_hands per camera", type=int, default=1
+    )
     parser.add_argument(
         "--min_detection_confidence",
         help="min_detection_confidence",
@@ -39,56 +120,433 @@ def get_args():
         type=int,
         default=0.5,
     )
+    parser.add_argument(
+        "--detect_interval",
+        help="Run MediaPipe on the full frame every N frames (0: only when the hand is lost); "
+        "the frames in between use --roi_size crops or extrapolated landmarks",
+        type=int,
+        default=1,
+    )
+    parser.add_argument(
+        "--roi_size",
+        help="Between full-frame detections, track the hand in a crop downscaled to this size (0: extrapolate)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--max_extrapolated",
+        help="Without --roi_size, detect the full frame after this many extrapolated frames in a row",
+        type=int,
+        default=3,
+    )
     parser.add_argument(
         "--ip", help="Send artnet to IP address", type=str, default="10.255.255.2"
     )
     parser.add_argument("--port", help="Send artnet to port", type=int, default=6454)
+    parser.add_argument(
+        "--artnet_map",
+        help="JSON channel map of Art-Net nodes/universes (overrides --ip/--port)",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--artnet_rate", help="Art-Net refresh rate (Hz)", type=float, default=40
+    )
+    parser.add_argument(
+        "--artnet_keep_alive",
+        help="Resend unchanged Art-Net data after this many seconds",
+        type=float,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--artnet_16bit",
+        help="Send x and y as 16-bit coarse/fine channel pairs (class, x, x fine, y, y fine)",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--pointer_filter",
+        help="Smoothing and latency compensation of the pointer coordinates",
+        choices=("none", "one_euro", "kalman"),
+        default="none",
+    )
+    parser.add_argument(
+        "--pointer_min_cutoff",
+        help="One-Euro minimum cutoff frequency (Hz); lower is smoother at rest",
+        type=float,
+        default=1.0,
+    )
+    parser.add_argument(
+        "--pointer_beta",
+        help="One-Euro speed coefficient; higher is less lag in fast movements",
+        type=float,
+        default=0.007,
+    )
+    parser.add_argument(
+        "--pointer_noise",
+        help="Kalman measurement noise of the fingertip (pixels)",
+        type=float,
+        default=3.0,
+    )
+    parser.add_argument(
+        "--pointer_lead",
+        help="Extrapolate the pointer this many ms beyond the send time (fixture latency)",
+        type=float,
+        default=0.0,
+    )
+    parser.add_argument(
+        "--pointer_max_prediction",
+        help="Extrapolate the pointer at most this many ms past the last frame",
+        type=float,
+        default=100.0,
+    )
+    parser.add_argument(
+        "--gesture_history_length",
+        help="Number of frames in the finger gesture majority vote",
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        "--gesture_hold",
+        help="Frames a hand sign must be the most likely one before it is sent; "
+        "one value or one per hand sign class",
+        type=int,
+        nargs="+",
+        default=[2, 2, 1, 2],
+    )
+    parser.add_argument(
+        "--gesture_enter",
+        help="Minimum probability of a hand sign frame counted towards --gesture_hold",
+        type=float,
+        default=0.5,
+    )
+    parser.add_argument(
+        "--gesture_exit",
+        help="The sent hand sign can only change once its probability drops below this (1: no hysteresis)",
+        type=float,
+        default=0.3,
+    )
+    parser.add_argument(
+        "--gesture_cooldown",
+        help="Frames a newly sent hand sign is kept at least; one value or one per class",
+        type=int,
+        nargs="+",
+        default=[0],
+    )
+    parser.add_argument(
+        "--pointer_confidence",
+        help="Skip the finger gesture (point history) classifier below this Pointer probability",
+        type=float,
+        default=0.5,
+    )
+    parser.add_argument(
+        "--backend",
+        help="Inference backend for the classifiers; numpy starts fastest with the least memory, "
+        "tflite has the lowest per-call latency",
+        choices=BACKENDS,
+        default="tflite",
+    )
+    parser.add_argument(
+        "--quantization",
+        help="Classifier model variant; float16 / int8 are created by tools/quantize.py (tflite backends). "
+        "A classifier without the variant uses its shipped model, with a warning",
+        choices=QUANTIZATIONS,
+        default="none",
+    )
+    parser.add_argument(
+        "--dataset_chunks",
+        help="Also save logged training data as .npz chunks next to the CSV files",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--pipeline",
+        help="Run capture, inference, Art-Net output and display in separate stages",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--camera_processes",
+        help="Run capture and MediaPipe of each camera in its own process",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--headless",
+        help="Do not build or show the debug image; stop with Ctrl+C / SIGTERM",
+        action="store_true",
+    )
+    parser.add_argument(
+        "--event_log",
+        help="Append structured events (JSON lines) to this file instead of stderr",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--log_level",
+        help="Lowest level of the events that are logged",
+        choices=("debug", "info", "warning", "error"),
+        default="info",
+    )
+    parser.add_argument(
+        "--event_rate",
+        help="Maximum events per second of each kind; the rest are counted",
+        type=float,
+        default=10.0,
+    )
+    parser.add_argument(
+        "--metrics_port",
+        help="Serve per-stage duration histograms on this local HTTP port (0: off)",
+        type=int,
+        default=0,
+    )
+    parser.add_argument(
+        "--metrics_json",
+        help="Periodically write the per-stage duration histograms to this JSON file",
+        type=str,
+        default=None,
+    )
+    parser.add_argument(
+        "--metrics_interval",
+        help="Seconds between --metrics_json dumps",
+        type=float,
+        default=5.0,
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    if args.detect_interval < 0:
+        parser.error("--detect_interval must be 0 or more")
+    if args.detect_interval == 0 and args.roi_size <= 0:
+        parser.error("--detect_interval 0 needs --roi_size; extrapolated hands are never lost")
 
     return args
 
 
-async def main_async():
-    start_time = time.time()
-    # Argument parsing #################################################################
-    args = get_args()
-
-    cap_device = args.device
-    cap_width = args.width
-    cap_height = args.height
+class GestureRecognizer(object):
+    def __init__(
+        self,
+        keypoint_classifier,
+        point_history_classifier,
+        history_length=16,
+        gesture_history_length=None,
+        dataset_writers=None,
+        metrics=None,
+        events=None,
+        create_debouncer=GestureDebouncer,
+        pointer_confidence=0.0,
+    ):
+        self.keypoint_classifier = keypoint_classifier
+        self.point_history_classifier = point_history_classifier
+        # mode -> DatasetWriter for the logging modes
+        self.dataset_writers = dataset_writers
+        self.metrics = metrics or NO_METRICS
+        # utils.EventLog for hand found/lost and gesture changes
+        self.events = events
+        self._gestures = {}  # slot -> (hand_sign_id, finger_gesture_id)
+        # The point history is only preprocessed and classified for hands
+        # whose "Pointer" probability reaches this
+        self.pointer_confidence = pointer_confidence
+        self.point_history_runs = 0
+        self.point_history_skips = 0
+
+        # Coordinate / finger gesture history per hand slot (source, hand);
+        # hand numbers follow the hands across frames (HandSlots), not
+        # MediaPipe's list order. history_length is the point history classifier's input length;
+        # the finger gesture vote may span a longer window
+        self.history_length = history_length
+        self.gesture_history_length = gesture_history_length or history_length
+        self.point_histories = {}
+        self.finger_gesture_histories = {}
+        # Debounced hand sign per slot, sent to Art-Net as "gesture_id"
+        self.create_debouncer = create_debouncer
+        self.debouncers = {}
+        self.hand_slots = HandSlots()
+        self._histories((0, 0))
+
+    def _histories(self, slot):
+        if slot not in self.point_histories:
+            self.point_histories[slot] = PointHistory(self.history_length)
+            self.finger_gesture_histories[slot] = ModeVote(self.gesture_history_length)
+            self.debouncers[slot] = self.create_debouncer()
+        return self.point_histories[slot], self.finger_gesture_histories[slot]
+
+    @property
+    def point_history(self):
+        return self.point_histories[(0, 0)]
+
+    def __call__(self, sources, number=-1, mode=0):
+        # sources: [((image_width, image_height), results), ...], one entry per camera
+        hand_results = []
+        landmark_features = []
+
+        with self.metrics.measure("preprocess"):
+            self._preprocess(sources, number, mode, hand_results, landmark_features)
+
+        # Slots that have no hand in this frame
+        detected_slots = set(hand_result["slot"] for hand_result in hand_results)
+        for slot, point_history in self.point_histories.items():
+            if slot not in detected_slots:
+                point_history.append([0, 0])
+                self.debouncers[slot].reset()
+                if self._gestures.pop(slot, None) is not None and self.events is not None:
+                    self.events.info("hand_lost", source=slot[0], hand=slot[1])
+
+        if len(hand_results) == 0:
+            return hand_results
+
+        # Hand sign classification, one invoke for every hand of every source
+        with self.metrics.measure("keypoint_classifier"):
+            hand_sign_probabilities = self.keypoint_classifier.predict_batch(
+                np.stack(landmark_features)
+            )
+            hand_sign_ids = hand_sign_probabilities.argmax(axis=1)
+
+        now = time.perf_counter()
+        pointing = []
+        point_history_features = []
+        for index, hand_result in enumerate(hand_results):
+            point_history, _ = self._histories(hand_result["slot"])
+            probabilities = hand_sign_probabilities[index]
+            hand_sign_id = int(hand_sign_ids[index])
+            hand_result["hand_sign_id"] = hand_sign_id
+            hand_result["hand_sign_score"] = float(probabilities[hand_sign_id])
+            gesture_id = self._debounce(hand_result["slot"], probabilities, now)
+            hand_result["gesture_id"] = gesture_id
+            hand_result["gesture_score"] = (
+                0.0 if gesture_id is None else float(probabilities[gesture_id])
+            )
+            if hand_sign_id == 2:  # Point gesture
+                # Only a full history of a confident pointer can give a
+                # finger gesture; features of the history before this frame
+                if len(point_history) == self.history_length:
+                    if probabilities[2] >= self.pointer_confidence:
+                        with self.metrics.measure("point_history_preprocess"):
+                            point_history_features.append(pre_process_point_history(
+                                point_history.array(), *hand_result["image_size"]
+                            ))
+                        pointing.append(index)
+                    else:
+                        self.point_history_skips += 1
+                point_history.append(hand_result["landmark_list"][8])
+            else:
+                point_history.append([0, 0])
+
+        # Finger gesture classification, batched over the pointing hands
+        finger_gesture_ids = [0] * len(hand_results)
+        if len(pointing) > 0:
+            self.point_history_runs += len(pointing)
+            with self.metrics.measure("point_history_classifier"):
+                pointing_ids = self.point_history_classifier.classify_batch(
+                    np.stack(point_history_features)
+                )
+            for index, finger_gesture_id in zip(pointing, pointing_ids):
+                finger_gesture_ids[index] = int(finger_gesture_id)
 
-    use_static_image_mode = args.use_static_image_mode
-    min_detection_confidence = args.min_detection_confidence
-    min_tracking_confidence = args.min_tracking_confidence
+        for hand_result, finger_gesture_id in zip(hand_results, finger_gesture_ids):
+            _, finger_gesture_history = self._histories(hand_result["slot"])
 
-    ip_address = args.ip
-    port = args.port
+            # Most common gesture ID in the latest detections
+            hand_result["finger_gesture_id"] = finger_gesture_history.append(
+                finger_gesture_id
+            )
 
-    use_brect = True
+            self._log_gesture(hand_result)
+
+        return hand_results
+
+    def _debounce(self, slot, probabilities, now):
+        debouncer = self.debouncers[slot]
+        decisions = debouncer.decisions
+        gesture_id = debouncer.update(probabilities, now)
+        if debouncer.decisions != decisions:
+            if debouncer.latency_seconds is not None:
+                self.metrics.observe("gesture_decision", debouncer.latency_seconds * 1000.0)
+            if self.events is not None:
+                self.events.debug(
+                    "gesture_decision",
+                    source=slot[0],
+                    hand=slot[1],
+                    hand_sign=gesture_id,
+                    latency_frames=debouncer.latency,
+                )
+        return gesture_id
+
+    def _log_gesture(self, hand_result):
+        slot = hand_result["slot"]
+        gesture = (hand_result["hand_sign_id"], hand_result["finger_gesture_id"])
+        previous = self._gestures.get(slot)
+        if gesture == previous:
+            return
+        self._gestures[slot] = gesture
+        if self.events is None:
+            return
+
+        if previous is None:
+            self.events.info("hand_found", source=slot[0], hand=slot[1])
+        self.events.info(
+            "gesture",
+            source=slot[0],
+            hand=slot[1],
+            hand_sign=gesture[0],
+            finger_gesture=gesture[1],
+        )
 
-    # Camera preparation ###############################################################
-    cap = cv.VideoCapture(cap_device)
-    cap.set(cv.CAP_PROP_FRAME_WIDTH, cap_width)
-    cap.set(cv.CAP_PROP_FRAME_HEIGHT, cap_height)
+    def _preprocess(self, sources, number, mode, hand_results, landmark_features):
+        # Landmarks -> classifier inputs of every hand of every source
+        for source_index, ((image_width, image_height), results) in enumerate(sources):
+            hands = []
+            if results.multi_hand_landmarks is not None:
+                for hand_landmarks, handedness in zip(
+                    results.multi_hand_landmarks, results.multi_handedness
+                ):
+                    # Landmark calculation (replays already provide arrays)
+                    if isinstance(hand_landmarks, np.ndarray):
+                        landmark_array = hand_landmarks
+                    else:
+                        landmark_array = landmarks_to_array(hand_landmarks)
+                    landmark_list = calc_landmark_points(
+                        landmark_array, image_width, image_height
+                    )
+                    hands.append((landmark_list, handedness))
+
+            # Same hand, same slot: matched to the previous frame by wrist
+            hand_numbers = self.hand_slots.assign(
+                source_index, [landmark_list[0] for landmark_list, _ in hands], image_width
+            )
+            for hand_number, (landmark_list, handedness) in zip(hand_numbers, hands):
+                slot = (source_index, hand_number)
+                point_history, _ = self._histories(slot)
 
-    # Model load #############################################################
-    mp_hands = mp.solutions.hands
-    hands = mp_hands.Hands(
-        static_image_mode=use_static_image_mode,
-        max_num_hands=1,
-        min_detection_confidence=min_detection_confidence,
-        min_tracking_confidence=min_tracking_confidence,
-    )
+                # Bounding box calculation
+                brect = calc_bounding_rect(landmark_list)
 
-    keypoint_classifier = KeyPointClassifier()
+                # Conversion to relative coordinates / normalized coordinates
+                pre_processed_landmark_list = pre_process_landmark(landmark_list)
+                # The classifier input is computed after the hand sign
+                # classification, only for pointing hands
+                pre_processed_point_history_list = None
+                if mode == 2:
+                    pre_processed_point_history_list = pre_process_point_history(
+                        point_history.array(), image_width, image_height
+                    )
+                # Write to the dataset file
+                logging_csv(
+                    number,
+                    mode,
+                    pre_processed_landmark_list,
+                    pre_processed_point_history_list,
+                    self.dataset_writers,
+                )
 
-    point_history_classifier = PointHistoryClassifier()
+                landmark_features.append(pre_processed_landmark_list)
+                hand_results.append(
+                    {
+                        "slot": slot,
+                        "image_size": (image_width, image_height),
+                        "brect": brect,
+                        "landmark_list": landmark_list,
+                        "handedness": handedness,
+                    }
+                )
 
-    
-    artnet_handler = ArtnetHandler(ip_address=ip_address, port=port)
 
-    # Read labels ###########################################################
+def load_labels():
     with open(
         "model/keypoint_classifier/keypoint_classifier_label.csv", encoding="utf-8-sig"
     ) as f:
@@ -102,260 +560,824 @@ async def main_async():
         point_history_classifier_labels = [
             row[0] for row in point_history_classifier_labels
         ]
+    return keypoint_classifier_labels, point_history_classifier_labels
+
+
+def create_capture(args, device, events=None):
+    if args.camera_processes and not is_landmark_source(device):
+        return CameraWorker(
+            partial(create_worker_camera, args, device),
+            max_num_hands=args.max_num_hands,
+            share_frames=not args.headless,
+            # Video files at full speed: no frame is skipped
+            lockstep=isinstance(device, str) and args.replay_speed == "max",
+            events=events,
+            name=f"camera {device}",
+        )
+    return open_capture(args, device)
 
-    # FPS Measurement ########################################################
-    cvFpsCalc = CvFpsCalc(buffer_len=10)
 
-    # Coordinate history #################################################################
-    history_length = 16
-    point_history = deque(maxlen=history_length)
+def is_landmark_source(device):
+    return isinstance(device, str) and (device.endswith(".npz") or os.path.isdir(device))
 
-    # Finger gesture history ################################################
-    finger_gesture_history = deque(maxlen=history_length)
 
-    #  ########################################################################
-    mode = 0
+def open_capture(args, device):
+    realtime = args.replay_speed == "realtime"
+    if is_landmark_source(device):
+        return LandmarkReplay(device, realtime=realtime)
+    if isinstance(device, str):
+        return VideoReplay(device, realtime=realtime)
 
-    while True:
-        fps = cvFpsCalc.get()
+    cap = cv.VideoCapture(device)
+    cap.set(cv.CAP_PROP_FRAME_WIDTH, args.width)
+    cap.set(cv.CAP_PROP_FRAME_HEIGHT, args.height)
+    return cap
 
-        # Process Key (ESC: end) #################################################
-        key = cv.waitKey(10)
-        if key == 27:  # ESC
-            break
-        number, mode = select_mode(key, mode)
 
-        # Camera capture #####################################################
-        ret, image = cap.read()
-        if not ret:
-            break
-        image = cv.flip(image, 1)  # Mirror display
-        debug_image = copy.deepcopy(image)
+def create_hands(args, cap=None, preprocess=None):
+    if isinstance(cap, (LandmarkReplay, CameraWorker)):
+        # The recorded landmarks / the camera worker replace MediaPipe
+        return cap
 
-        # Detection implementation #############################################################
-        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+    hands = create_mediapipe_hands(args)
+    if args.detect_interval != 1 or args.roi_size > 0:
+        roi_hands = create_mediapipe_hands(args) if args.roi_size > 0 else None
+        return DetectionScheduler(
+            hands,
+            roi_hands=roi_hands,
+            detect_interval=args.detect_interval,
+            roi_size=args.roi_size,
+            preprocess=preprocess,
+            max_extrapolated=args.max_extrapolated,
+        )
+    return hands
 
-        image.flags.writeable = False
-        results = hands.process(image)
-        image.flags.writeable = True
 
-        #  ####################################################################
-        if results.multi_hand_landmarks is not None:
-            for hand_landmarks, handedness in zip(
-                results.multi_hand_landmarks, results.multi_handedness
-            ):
-                # Bounding box calculation
-                brect = calc_bounding_rect(debug_image, hand_landmarks)
-                # Landmark calculation
-                landmark_list = calc_landmark_list(debug_image, hand_landmarks)
+def create_debouncer(args):
+    return partial(
+        GestureDebouncer,
+        hold_frames=args.gesture_hold,
+        enter_threshold=args.gesture_enter,
+        exit_threshold=args.gesture_exit,
+        cooldown_frames=args.gesture_cooldown,
+    )
 
-                # Conversion to relative coordinates / normalized coordinates
-                pre_processed_landmark_list = pre_process_landmark(landmark_list)
-                pre_processed_point_history_list = pre_process_point_history(
-                    debug_image, point_history
-                )
-                # Write to the dataset file
-                logging_csv(
-                    number,
-                    mode,
-                    pre_processed_landmark_list,
-                    pre_processed_point_history_list,
-                )
 
-                # Hand sign classification
-                finger_gesture_id = 0
-                hand_sign_id = keypoint_classifier(pre_processed_landmark_list)
-                if hand_sign_id == 2:  # Point gesture
-                    point_history.append(landmark_list[8])
-                    
-                    # Finger gesture classification
-                    
-                    point_history_len = len(pre_processed_point_history_list)
-                    if point_history_len == (history_length * 2):
-                        finger_gesture_id = point_history_classifier(
-                            pre_processed_point_history_list
-                        )
-        
-
-                else:
-                    point_history.append([0, 0])
-                
-                
-
-                # Calculates the gesture IDs in the latest detection
-                finger_gesture_history.append(finger_gesture_id)
-                most_common_fg_id = Counter(finger_gesture_history).most_common()
-
-                # Drawing part
-                debug_image = draw_bounding_rect(use_brect, debug_image, brect)
-                debug_image = draw_landmarks(debug_image, landmark_list)
-                debug_image = draw_info_text(
-                    debug_image,
-                    brect,
-                    handedness,
-                    keypoint_classifier_labels[hand_sign_id],
-                    point_history_classifier_labels[most_common_fg_id[0][0]],
-                )
-                
-############### Send artnet ############################################################
-                
-                if artnet_handler.is_valid_data(hand_sign_id):
-                    print(hand_sign_id)
-                    try:
-                        x_norm, y_norm = await artnet_handler.send_data(index=hand_sign_id, landmark=landmark_list, weight=720, height=550)
-                    except TypeError:
-                        x_norm, y_norm = None, None
-                    except OSError as e:
-                        # Handle network errors
-                        if e.errno == 101:  # Network is unreachable
-                            print("Network error: The specified address is unreachable.")
-                        else:
-                            print(f"Network error occurred: {e}")
-                        x_norm, y_norm = None, None
-                    except Exception as e:
-                        # Handle other possible exceptions
-                        print(f"An unexpected error occurred: {e}")
-                        x_norm, y_norm = None, None
-
-                    if x_norm is not None and y_norm is not None:
-                        debug_image = draw_normalized_coordinates(debug_image, x_norm, y_norm)
-
-        else:   
-            point_history.append([0, 0])
-            await artnet_handler.send_data(index=0, landmark=None, weight=720, height=550)
+def create_classifiers(args, events=None):
+    return (
+        create_classifier(KeyPointClassifier, args, events),
+        create_classifier(PointHistoryClassifier, args, events),
+    )
 
-############### Draw the rest ############################################################
-            
-        debug_image = draw_point_history(debug_image, point_history)
-        debug_image = draw_info(debug_image, fps, mode, number)
 
-        hours, minutes, seconds = get_elapsed_time(start_time)
-        debug_image = draw_time(debug_image, hours, minutes, seconds)
+def create_classifier(classifier_class, args, events=None):
+    try:
+        return classifier_class(backend=args.backend, quantization=args.quantization)
+    except FileNotFoundError as e:
+        if args.quantization == "none":
+            raise
+        # tools/quantize.py only writes an int8 variant where it had a
+        # dataset to calibrate with; use the shipped model instead
+        if events is not None:
+            events.warning(
+                "quantization_fallback",
+                model=classifier_class.__name__,
+                quantization=args.quantization,
+                message=str(e),
+            )
+        else:
+            print(f"Warning: {e}; {classifier_class.__name__} uses the shipped model")
+        return classifier_class(backend=args.backend)
 
 
+def create_sources(args, events=None, startup=None):
+    # Opens the cameras, imports MediaPipe and loads the classifiers in
+    # parallel threads instead of one after the other
+    startup = startup or StartupTimer()
+    needs_mediapipe = not args.camera_processes and not all(
+        is_landmark_source(device) for device in args.device
+    )
+    with ThreadPoolExecutor(max_workers=len(args.device) + 2) as executor:
+        if needs_mediapipe:
+            mediapipe_import = executor.submit(
+                startup.run, "import mediapipe", importlib.import_module, "mediapipe"
+            )
+        cap_futures = [
+            executor.submit(
+                startup.run, f"capture {device}", create_capture, args, device, events
+            )
+            for device in args.device
+        ]
+        classifiers = executor.submit(
+            startup.run, "classifiers", create_classifiers, args, events
+        )
 
-        # Screen reflection #############################################################
-        cv.imshow("Hand Gesture Recognition", debug_image)
-        
-        #await asyncio.sleep(0.01)
-    
-    cap.release()
-    cv.destroyAllWindows()
+        caps = [cap_future.result() for cap_future in cap_futures]
+        if needs_mediapipe:
+            mediapipe_import.result()
+        with startup.measure("hands"):
+            preprocessors = [FramePreprocessor(args.inference_width) for _ in caps]
+            hands_list = [
+                create_hands(args, cap, preprocess)
+                for cap, preprocess in zip(caps, preprocessors)
+            ]
+        keypoint_classifier, point_history_classifier = classifiers.result()
+
+    return caps, preprocessors, hands_list, keypoint_classifier, point_history_classifier
+
+
+def report_startup(startup, events):
+    if startup.mark("first_frame"):
+        print(startup.report())
+        events.info("startup", steps=startup.steps, milestones=startup.milestones)
+
+
+def create_worker_camera(args, device):
+    # Runs in the CameraWorker process of one camera. The frames are not
+    # flipped there; the landmarks are mirrored like in --headless
+    cap = open_capture(args, device)
+    preprocess = FramePreprocessor(args.inference_width)
+    hands = create_hands(args, cap, preprocess)
+    detect = partial(
+        detect_hands, hands, frame_id=None, preprocess=preprocess, mirror=True
+    )
+    return cap, detect
 
 
-def select_mode(key, mode):
-    number = -1
-    if 48 <= key <= 57:  # 0 ~ 9
-        number = key - 48
-    if key == 110:  # n
-        mode = 0
-    if key == 107:  # k
-        mode = 1
-    if key == 104:  # h
-        mode = 2
-    return number, mode
+def create_mediapipe_hands(args):
+    # Imported on first use: with TensorFlow installed, importing mediapipe
+    # also imports TensorFlow and takes seconds
+    import mediapipe as mp
 
+    mp_hands = mp.solutions.hands
+    hands = mp_hands.Hands(
+        static_image_mode=args.use_static_image_mode,
+        max_num_hands=args.max_num_hands,
+        min_detection_confidence=args.min_detection_confidence,
+        min_tracking_confidence=args.min_tracking_confidence,
+    )
+    return hands
+
+
+def detect_hands(hands, image, frame_id, preprocess, mirror=False, metrics=None):
+    # mirror: image is the unflipped capture, mirror the landmarks instead
+    metrics = metrics or NO_METRICS
+    if isinstance(hands, (LandmarkReplay, CameraWorker)):
+        return hands.results(frame_id)
+    if isinstance(hands, DetectionScheduler):
+        # Converts the frame itself
+        with metrics.measure("mediapipe"):
+            results = hands.detect(image)
+    else:
+        with metrics.measure("convert"):
+            image = preprocess(image)
+        with metrics.measure("mediapipe"):
+            results = hands.process(image)
+
+    if mirror:
+        results = mirror_results(results)
+    return results
+
+
+def update_artnet(artnet_handler, hand_results, capture_time=None):
+    # Non-blocking: the handler's refresh task sends the values
+    x_norm, y_norm = None, None
+
+    if len(hand_results) == 0:
+        artnet_handler.set_data(
+            index=0, landmark=None, weight=720, height=550, capture_time=capture_time
+        )
+        return x_norm, y_norm
+
+    # One set of channels for all hands: the handler keeps following the
+    # same hand and otherwise picks the most confident pointer, then the
+    # most confident other hand. Hand signs are debounced by the
+    # recognizer; gesture_id is None while none is accepted
+    hands = sorted(
+        (
+            hand_result
+            for hand_result in hand_results
+            if hand_result["gesture_id"] is not None
+        ),
+        key=lambda hand_result: (
+            hand_result["gesture_id"] != 2,
+            -hand_result["gesture_score"],
+        ),
+    )
+    coordinates = artnet_handler.set_hands(
+        [
+            (hand_result["slot"], hand_result["gesture_id"], hand_result["landmark_list"])
+            for hand_result in hands
+        ],
+        weight=720,
+        height=550,
+        capture_time=capture_time,
+    )
+    if coordinates is not None:
+        x_norm, y_norm = coordinates
 
-def calc_bounding_rect(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
+    return x_norm, y_norm
 
-    landmark_array = np.empty((0, 2), int)
 
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
+def create_pointer_filter(args):
+    max_prediction = args.pointer_max_prediction / 1000.0
+    if args.pointer_filter == "one_euro":
+        return OneEuroFilter(
+            min_cutoff=args.pointer_min_cutoff,
+            beta=args.pointer_beta,
+            max_prediction=max_prediction,
+        )
+    if args.pointer_filter == "kalman":
+        return KalmanFilter(
+            measurement_noise=args.pointer_noise, max_prediction=max_prediction
+        )
+    return None
+
+
+def create_artnet_handler(args, on_send=None, metrics=None, events=None):
+    if args.artnet_map is not None:
+        channel_map = load_channel_map(args.artnet_map)
+    else:
+        channel_map = default_channel_map(args.ip, args.port, fine=args.artnet_16bit)
+
+    return ArtnetHandler(
+        refresh_rate=args.artnet_rate,
+        keep_alive=args.artnet_keep_alive,
+        channel_map=channel_map,
+        on_send=on_send,
+        metrics=metrics,
+        events=events,
+        pointer_filter=create_pointer_filter(args),
+        prediction_lead=args.pointer_lead / 1000.0,
+    )
 
-        landmark_point = [np.array((landmark_x, landmark_y))]
 
-        landmark_array = np.append(landmark_array, landmark_point, axis=0)
+def create_event_log(args):
+    events = EventLog(
+        path=args.event_log, level=args.log_level, rate=args.event_rate
+    )
+    events.start()
+    return events
+
+
+def create_metrics(args):
+    # Recording starts enabled when the histograms are exported; "p" or
+    # the HTTP /enable, /disable endpoints switch it at runtime
+    metrics = Metrics(enabled=args.metrics_port > 0 or args.metrics_json is not None)
+    exporters = []
+    if args.metrics_port > 0:
+        exporters.append(MetricsServer(metrics, port=args.metrics_port))
+    if args.metrics_json is not None:
+        exporters.append(MetricsDumper(metrics, args.metrics_json, args.metrics_interval))
+    for exporter in exporters:
+        exporter.start()
+    return metrics, exporters
+
+
+def stop_metrics(exporters):
+    for exporter in exporters:
+        exporter.stop()
+
+
+def print_metrics(metrics):
+    for stage, stats in metrics.snapshot()["stages"].items():
+        print(
+            f"{stage}: n={stats['count']} mean {stats['mean_ms']:.3f} ms"
+            f" p50 {stats['p50_ms']:.3f} p95 {stats['p95_ms']:.3f} p99 {stats['p99_ms']:.3f}"
+        )
 
-    x, y, w, h = cv.boundingRect(landmark_array)
 
-    return [x, y, x + w, y + h]
+def print_throughput(frame_count, elapsed):
+    print(f"Frames: {frame_count} in {elapsed:.2f}s ({frame_count / max(elapsed, 1e-9):.1f} fps)")
 
 
-def calc_landmark_list(image, landmarks):
-    image_width, image_height = image.shape[1], image.shape[0]
+def print_detection_stats(hands_list):
+    for hands in hands_list:
+        if isinstance(hands, CameraWorker):
+            print(f"{hands.name}: worker restarts {hands.restarts}")
+        if isinstance(hands, DetectionScheduler):
+            print(
+                "Hand detection: full frame",
+                hands.full_frames,
+                "/ roi",
+                hands.roi_frames,
+                "/ extrapolated",
+                hands.extrapolated_frames,
+            )
 
-    landmark_point = []
 
-    # Keypoint
-    for _, landmark in enumerate(landmarks.landmark):
-        landmark_x = min(int(landmark.x * image_width), image_width - 1)
-        landmark_y = min(int(landmark.y * image_height), image_height - 1)
-        # landmark_z = landmark.z
+def print_gesture_stats(recognizer):
+    decisions = sum(debouncer.decisions for debouncer in recognizer.debouncers.values())
+    latency = sum(debouncer.total_latency for debouncer in recognizer.debouncers.values())
+    if decisions > 0:
+        print(
+            f"Hand sign decisions: {decisions}, mean latency {latency / decisions:.2f} frames"
+        )
+    if recognizer.point_history_runs + recognizer.point_history_skips > 0:
+        print(
+            "Point history classifier: run",
+            recognizer.point_history_runs,
+            "/ skipped (low Pointer confidence)",
+            recognizer.point_history_skips,
+        )
 
-        landmark_point.append([landmark_x, landmark_y])
 
-    return landmark_point
+def print_artnet_stats(artnet_handler):
+    print(
+        "Art-Net packets: sent",
+        artnet_handler.packets_sent,
+        "/ suppressed",
+        artnet_handler.packets_suppressed,
+        "/ errors",
+        artnet_handler.send_errors,
+    )
 
 
-def pre_process_landmark(landmark_list):
-    temp_landmark_list = copy.deepcopy(landmark_list)
+def draw_hand_results(
+    debug_image,
+    hand_results,
+    keypoint_classifier_labels,
+    point_history_classifier_labels,
+    use_brect=True,
+):
+    for hand_result in hand_results:
+        brect = hand_result["brect"]
+        debug_image = draw_bounding_rect(use_brect, debug_image, brect)
+        debug_image = draw_landmarks(debug_image, hand_result["landmark_list"])
+        debug_image = draw_info_text(
+            debug_image,
+            brect,
+            hand_result["handedness"],
+            keypoint_classifier_labels[hand_result["hand_sign_id"]],
+            point_history_classifier_labels[hand_result["finger_gesture_id"]],
+        )
+    return debug_image
 
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, landmark_point in enumerate(temp_landmark_list):
-        if index == 0:
-            base_x, base_y = landmark_point[0], landmark_point[1]
 
-        temp_landmark_list[index][0] = temp_landmark_list[index][0] - base_x
-        temp_landmark_list[index][1] = temp_landmark_list[index][1] - base_y
+async def main_async():
+    start_time = time.time()
+    startup = StartupTimer(START_TIME)
+    startup.mark("imports")
+    # Argument parsing #################################################################
+    args = get_args()
 
-    # Convert to a one-dimensional list
-    temp_landmark_list = list(itertools.chain.from_iterable(temp_landmark_list))
+    headless = args.headless or args.landmark_cache is not None
+    if not headless:
+        cv.namedWindow("Hand Gesture Recognition", cv.WND_PROP_AUTOSIZE)
+    shutdown_event = install_shutdown_handler()
+
+    if args.landmark_cache is not None:
+        await main_landmark_cache(args, shutdown_event)
+        return
+    if args.pipeline:
+        main_pipeline(args, start_time, shutdown_event, startup=startup)
+        return
+
+    metrics, metrics_exporters = create_metrics(args)
+    events = create_event_log(args)
+
+    # Art-Net first: the default state (no gesture) is sent right away and
+    # refreshed while the cameras and models start up
+    with startup.measure("artnet"):
+        artnet_handler = create_artnet_handler(args, metrics=metrics, events=events)
+        artnet_handler.start()
+        await asyncio.sleep(0)  # First refresh tick
+    if artnet_handler.packets_sent > 0:
+        startup.mark("first_packet")
+
+    # Camera preparation / Model load ##################################################
+    loop = asyncio.get_running_loop()
+    (
+        caps,
+        preprocessors,
+        hands_list,
+        keypoint_classifier,
+        point_history_classifier,
+    ) = await loop.run_in_executor(None, create_sources, args, events, startup)
+
+    dataset_writers = create_dataset_writers(args)
+    recognizer = GestureRecognizer(
+        keypoint_classifier,
+        point_history_classifier,
+        gesture_history_length=args.gesture_history_length,
+        create_debouncer=create_debouncer(args),
+        pointer_confidence=args.pointer_confidence,
+        dataset_writers=dataset_writers,
+        metrics=metrics,
+        events=events,
+    )
 
-    # Normalization
-    max_value = max(list(map(abs, temp_landmark_list)))
+    # Read labels ###########################################################
+    keypoint_classifier_labels, point_history_classifier_labels = load_labels()
 
-    def normalize_(n):
-        return n / max_value
+    # FPS Measurement ########################################################
+    cvFpsCalc = CvFpsCalc(buffer_len=10)
 
-    temp_landmark_list = list(map(normalize_, temp_landmark_list))
+    # Capture, MediaPipe and the classifiers run on one worker thread so the
+    # event loop stays free for the Art-Net refresh task
+    executor = ThreadPoolExecutor(max_workers=1)
+
+    def detect(frame_id, number, mode):
+        sources = []
+        debug_image = None
+        for index, (cap, hands, preprocess) in enumerate(zip(caps, hands_list, preprocessors)):
+            # Camera capture #####################################################
+            with metrics.measure(f"capture{index}"):
+                ret, image = cap.read()
+                if not ret:
+                    return None
+                if not headless:
+                    cv.flip(image, 1, dst=image)  # Mirror display, in place
+            if not headless and debug_image is None:
+                debug_image = image
+
+            # Detection implementation #############################################################
+            # Headless: the landmarks are mirrored instead of the pixels
+            results = detect_hands(
+                hands, image, frame_id, preprocess, mirror=headless, metrics=metrics
+            )
+
+            sources.append(((image.shape[1], image.shape[0]), results))
+
+        #  ####################################################################
+        with metrics.measure("classify"):
+            hand_results = recognizer(sources, number, mode)
+        return debug_image, hand_results
+
+    #  ########################################################################
+    mode = 0
+    number = -1
+    frame_id = 0
+    loop_start = time.perf_counter()
+
+    while not shutdown_event.is_set():
+        if not headless:
+            fps = cvFpsCalc.get()
+
+            # Process Key (ESC: end) #################################################
+            key = cv.waitKey(10)
+            if key == 27:  # ESC
+                break
+            number, mode = select_mode(key, mode)
+            toggle_metrics(key, metrics)
+
+        capture_time = time.perf_counter()
+        frame = await loop.run_in_executor(executor, detect, frame_id, number, mode)
+        if frame is None:
+            break
+        if frame_id == 0:
+            report_startup(startup, events)
+        frame_id += 1
+        debug_image, hand_results = frame
+
+############### Send artnet ############################################################
+
+        with metrics.measure("artnet"):
+            x_norm, y_norm = update_artnet(artnet_handler, hand_results, capture_time)
+
+        if headless:
+            continue
+
+        # Drawing part
+        draw_start = time.perf_counter()
+        debug_image = draw_hand_results(
+            debug_image,
+            hand_results,
+            keypoint_classifier_labels,
+            point_history_classifier_labels,
+        )
+        if x_norm is not None and y_norm is not None:
+            debug_image = draw_normalized_coordinates(debug_image, x_norm, y_norm)
+
+############### Draw the rest ############################################################
 
-    return temp_landmark_list
+        for slot, point_history in recognizer.point_histories.items():
+            if slot[0] == 0:
+                debug_image = draw_point_history(debug_image, point_history)
+        debug_image = draw_info(debug_image, fps, mode, number)
 
+        hours, minutes, seconds = get_elapsed_time(start_time)
+        debug_image = draw_time(debug_image, hours, minutes, seconds)
+        metrics.observe("draw", (time.perf_counter() - draw_start) * 1000.0)
 
-def pre_process_point_history(image, point_history):
-    image_width, image_height = image.shape[1], image.shape[0]
+        # Screen reflection #############################################################
+        cv.imshow("Hand Gesture Recognition", debug_image)
 
-    temp_point_history = copy.deepcopy(point_history)
+    print_throughput(frame_id, time.perf_counter() - loop_start)
+    print_detection_stats(hands_list)
+    print_gesture_stats(recognizer)
+    await artnet_handler.stop()
+    print_artnet_stats(artnet_handler)
+    stop_metrics(metrics_exporters)
+    events.close()
+    print_metrics(metrics)
+    executor.shutdown()
+    close_dataset_writers(dataset_writers)
+
+    for cap in caps:
+        cap.release()
+    if not headless:
+        cv.destroyAllWindows()
+
+
+async def main_landmark_cache(args, shutdown_event):
+    # Recorded landmarks straight into the classifiers and Art-Net output:
+    # no capture, MediaPipe, images or worker threads
+    replay = LandmarkReplay(args.landmark_cache, realtime=False)
+    image_size = (replay.width, replay.height)
+    realtime = args.replay_speed == "realtime"
+    metrics, metrics_exporters = create_metrics(args)
+    events = create_event_log(args)
+
+    artnet_handler = create_artnet_handler(args, metrics=metrics, events=events)
+    artnet_handler.start()
+
+    recognizer = GestureRecognizer(
+        *create_classifiers(args, events),
+        gesture_history_length=args.gesture_history_length,
+        create_debouncer=create_debouncer(args),
+        pointer_confidence=args.pointer_confidence,
+        metrics=metrics,
+        events=events,
+    )
 
-    # Convert to relative coordinates
-    base_x, base_y = 0, 0
-    for index, point in enumerate(temp_point_history):
-        if index == 0:
-            base_x, base_y = point[0], point[1]
+    loop_start = time.perf_counter()
+    frame_count = 0
+    for frame_id in range(len(replay)):
+        if shutdown_event.is_set():
+            break
+        if realtime:
+            delay = loop_start + replay.timestamps[frame_id] - time.perf_counter()
+            await asyncio.sleep(max(delay, 0))
+        elif frame_id % 100 == 0:
+            await asyncio.sleep(0)  # Let the Art-Net refresh task run
+
+        capture_time = time.perf_counter()
+        with metrics.measure("classify"):
+            hand_results = recognizer([(image_size, replay.results(frame_id))])
+        with metrics.measure("artnet"):
+            update_artnet(artnet_handler, hand_results, capture_time)
+        frame_count += 1
+
+    print_throughput(frame_count, time.perf_counter() - loop_start)
+    print_gesture_stats(recognizer)
+    await artnet_handler.stop()
+    print_artnet_stats(artnet_handler)
+    stop_metrics(metrics_exporters)
+    events.close()
+    print_metrics(metrics)
+
+
+def main_pipeline(args, start_time, shutdown_event, on_packet=None, startup=None):
+    # Stage layout ########################################################
+    #   capture thread --(ring buffer)--> inference thread
+    #   inference thread --(latest)--> Art-Net output thread (own event loop)
+    #   inference thread --(ring buffer)--> render (main thread, not headless)
+    metrics, metrics_exporters = create_metrics(args)
+    events = create_event_log(args)
+    timer = StageTimer(buffer_len=30, metrics=metrics)
+    startup = startup or StartupTimer()
+
+    # Written by the render stage, read by the inference/output stages
+    controls = {"mode": 0, "number": -1, "x_norm": None, "y_norm": None, "frames": 0}
+
+    def inference(frames):
+        sources = []
+        for (frame_id, _, image), hands, preprocess in zip(frames, hands_list, preprocessors):
+            with timer.measure("detect"):
+                results = detect_hands(
+                    hands, image, frame_id, preprocess, mirror=args.headless, metrics=metrics
+                )
+            sources.append(((image.shape[1], image.shape[0]), results))
 
-        temp_point_history[index][0] = (
-            temp_point_history[index][0] - base_x
-        ) / image_width
-        temp_point_history[index][1] = (
-            temp_point_history[index][1] - base_y
-        ) / image_height
+        with timer.measure("classify"):
+            hand_results = recognizer(
+                sources, controls["number"], controls["mode"]
+            )
+        if controls["frames"] == 0:
+            report_startup(startup, events)
+        controls["frames"] += 1
+
+        frame_id, _, image = frames[0]
+        return {
+            "frame_id": frame_id,
+            "capture_time": min(capture_time for _, capture_time, _ in frames),
+            "image": image,
+            "hand_results": hand_results,
+            "point_histories": [
+                point_history.array().copy()
+                for slot, point_history in recognizer.point_histories.items()
+                if slot[0] == 0
+            ],
+        }
+
+    def on_send(capture_time, send_time):
+        timer.add("packet", (send_time - capture_time) * 1000.0)
+        if on_packet is not None:
+            on_packet(capture_time, send_time)
+
+    async def setup_output():
+        artnet_handler = create_artnet_handler(
+            args, on_send=on_send, metrics=metrics, events=events
+        )
+        artnet_handler.start()
+        controls["artnet_handler"] = artnet_handler
+        await asyncio.sleep(0)  # First refresh tick
+        if artnet_handler.packets_sent > 0:
+            startup.mark("first_packet")
+
+        async def output(result):
+            x_norm, y_norm = update_artnet(
+                artnet_handler, result["hand_results"], result["capture_time"]
+            )
+            timer.add("latency", (time.perf_counter() - result["capture_time"]) * 1000.0)
+            controls["x_norm"], controls["y_norm"] = x_norm, y_norm
+
+        return output
+
+    # Art-Net first: the default state (no gesture) is sent right away and
+    # refreshed while the cameras and models start up
+    output_thread = AsyncOutputThread("artnet", setup_output, timer=timer)
+    output_thread.start()
+
+    try:
+        (
+            caps,
+            preprocessors,
+            hands_list,
+            keypoint_classifier,
+            point_history_classifier,
+        ) = create_sources(args, events, startup)
+    except BaseException:
+        output_thread.close()
+        output_thread.join()
+        raise
+    if not output_thread.is_alive():
+        for cap in caps:
+            cap.release()
+        stop_metrics(metrics_exporters)
+        events.close()
+        output_thread.raise_error()
+    dataset_writers = create_dataset_writers(args)
+    recognizer = GestureRecognizer(
+        keypoint_classifier,
+        point_history_classifier,
+        gesture_history_length=args.gesture_history_length,
+        create_debouncer=create_debouncer(args),
+        pointer_confidence=args.pointer_confidence,
+        dataset_writers=dataset_writers,
+        metrics=metrics,
+        events=events,
+    )
+    keypoint_classifier_labels, point_history_classifier_labels = load_labels()
 
-    # Convert to a one-dimensional list
-    temp_point_history = list(itertools.chain.from_iterable(temp_point_history))
+    frame_buffers = [RingBuffer(maxlen=2) for _ in caps]
+    render_buffer = RingBuffer(maxlen=1)
 
-    return temp_point_history
+    capture_threads = [
+        CaptureThread(
+            cap, frame_buffer, timer=timer, flip=not args.headless, name=f"capture{index}"
+        )
+        for index, (cap, frame_buffer) in enumerate(zip(caps, frame_buffers))
+    ]
+    sinks = [output_thread] if args.headless else [output_thread, render_buffer]
+    inference_thread = StageThread(
+        "inference", inference, ZipBuffer(frame_buffers), sinks, timer=timer
+    )
 
+    inference_thread.start()
+    for capture_thread in capture_threads:
+        capture_thread.start()
 
-def logging_csv(number, mode, landmark_list, point_history_list):
-    if mode == 0:
-        pass
+    cvFpsCalc = CvFpsCalc(buffer_len=10)
+    loop_start = time.perf_counter()
+
+    try:
+        # A dead output thread means no more DMX: stop and raise its error
+        while args.headless and not shutdown_event.is_set():
+            if not inference_thread.is_alive() or not output_thread.is_alive():
+                break
+            shutdown_event.wait(0.1)
+
+        while not args.headless and not shutdown_event.is_set():
+            if not output_thread.is_alive():
+                break
+            # Process Key (ESC: end) #################################################
+            key = cv.waitKey(1)
+            if key == 27:  # ESC
+                break
+            controls["number"], controls["mode"] = select_mode(key, controls["mode"])
+            toggle_metrics(key, metrics)
+
+            result = render_buffer.get(timeout=0.1)
+            if result is None:
+                if render_buffer.closed:
+                    break
+                continue
+
+            fps = cvFpsCalc.get()
+
+            with timer.measure("render"):
+                debug_image = draw_hand_results(
+                    result["image"],
+                    result["hand_results"],
+                    keypoint_classifier_labels,
+                    point_history_classifier_labels,
+                )
+                x_norm, y_norm = controls["x_norm"], controls["y_norm"]
+                if x_norm is not None and y_norm is not None:
+                    debug_image = draw_normalized_coordinates(debug_image, x_norm, y_norm)
+                for point_history in result["point_histories"]:
+                    debug_image = draw_point_history(debug_image, point_history)
+                debug_image = draw_info(debug_image, fps, controls["mode"], controls["number"])
+                debug_image = draw_stage_times(debug_image, timer.get())
+
+                hours, minutes, seconds = get_elapsed_time(start_time)
+                debug_image = draw_time(debug_image, hours, minutes, seconds)
+
+                cv.imshow("Hand Gesture Recognition", debug_image)
+    finally:
+        for capture_thread in capture_threads:
+            capture_thread.stop()
+            capture_thread.join()
+        inference_thread.join()
+        output_thread.join()
+
+        for cap in caps:
+            cap.release()
+        if not args.headless:
+            cv.destroyAllWindows()
+
+        print_throughput(controls["frames"], time.perf_counter() - loop_start)
+        print("Stage times (ms):", timer.get())
+        print_detection_stats(hands_list)
+        print(
+            "Dropped frames: capture",
+            [frame_buffer.dropped for frame_buffer in frame_buffers],
+            "/ artnet",
+            output_thread.dropped,
+        )
+        print_gesture_stats(recognizer)
+        if "artnet_handler" in controls:
+            print_artnet_stats(controls["artnet_handler"])
+        stop_metrics(metrics_exporters)
+        events.close()
+        print_metrics(metrics)
+        close_dataset_writers(dataset_writers)
+
+    inference_thread.raise_error()
+    output_thread.raise_error()
+
+
+def select_mode(key, mode):
+    number = -1
+    if 48 <= key <= 57:  # 0 ~ 9
+        number = key - 48
+    if key == 110:  # n
+        mode = 0
+    if key == 107:  # k
+        mode = 1
+    if key == 104:  # h
+        mode = 2
+    return number, mode
+
+
+def toggle_metrics(key, metrics):
+    if key == 112:  # p
+        metrics.enabled = not metrics.enabled
+
+
+def logging_csv(number, mode, landmark_list, point_history_list, dataset_writers=None):
+    # Rows are only buffered here, the DatasetWriter threads write the files
+    if mode == 0 or dataset_writers is None:
+        return
     if mode == 1 and (0 <= number <= 9):
-        csv_path = "model/keypoint_classifier/keypoint.csv"
-        with open(csv_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([number, *landmark_list])
+        dataset_writers[1].write(number, landmark_list)
     if mode == 2 and (0 <= number <= 9):
-        csv_path = "model/point_history_classifier/point_history.csv"
-        with open(csv_path, "a", newline="") as f:
-            writer = csv.writer(f)
-            writer.writerow([number, *point_history_list])
+        dataset_writers[2].write(number, point_history_list)
     return
 
 
+def create_dataset_writers(args):
+    dataset_writers = {}
+    for mode, (csv_path, width) in DATASET_PATHS.items():
+        chunk_dir = None
+        if args.dataset_chunks:
+            chunk_dir = os.path.splitext(csv_path)[0] + "_chunks"
+        dataset_writers[mode] = DatasetWriter(
+            csv_path, chunk_dir=chunk_dir, width=width, name=f"dataset_writer{mode}"
+        )
+        dataset_writers[mode].start()
+    return dataset_writers
+
+
+def close_dataset_writers(dataset_writers):
+    for dataset_writer in dataset_writers.values():
+        dataset_writer.close()
+        if dataset_writer.rows_written > 0:
+            print(f"Logged {dataset_writer.rows_written} rows to {dataset_writer.csv_path}")
+
+
 def draw_landmarks(image, landmark_point):
     if len(landmark_point) > 0:
         # Thumb
@@ -758,6 +1780,20 @@ def draw_normalized_coordinates(image, x_norm, y_norm):
         )
     return image
 
+def draw_stage_times(image, stage_times):
+    for index, (stage, elapsed_ms) in enumerate(stage_times.items()):
+        cv.putText(
+            image,
+            f"{stage}: {elapsed_ms:.1f}ms",
+            (10, 140 + index * 20),
+            cv.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (255, 255, 255),
+            1,
+            cv.LINE_AA,
+        )
+    return image
+
 def get_elapsed_time(start_time):
     elapsed_time = int(time.time() - start_time)
     hours, remainder = divmod(elapsed_time, 3600)
@@ -783,7 +1819,5 @@ def calculate_intensity(landmark_list, image):
     return image
 
 if __name__ == "__main__":
-    cv.namedWindow("Hand Gesture Recognition", cv.WND_PROP_AUTOSIZE)
-
     asyncio.run(main_async())
     asyncio.wait_for(main_async(), timeout=1.0)
@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""End-to-end latency from cap.read() to the Art-Net packet.
+
+Replays a recorded video through app.py's pipeline (headless) with Art-Net
+sent to a local tools.artnet_listener, and reports the p50/p95/p99 time
+from cap.read() until ArtnetHandler sent the packet with the new values,
+together with the packet rate seen by the listener.
+
+    python -m benchmarks.artnet_latency_benchmark --video hands.mp4
+"""
+import argparse
+import threading
+import time
+
+import numpy as np
+
+import app
+from tools.artnet_listener import ArtnetListener
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--video', help='Recorded video file(s), one per camera',
+                        type=str, nargs='+', required=True)
+    parser.add_argument('--port', help='Local listener port', type=int,
+                        default=6454)
+    parser.add_argument('--duration', help='Stop after this many seconds '
+                        '(0: at the end of the video)', type=float, default=0)
+    parser.add_argument('--backend', choices=app.BACKENDS, default='tflite')
+    parser.add_argument('--max_num_hands', type=int, default=1)
+    parser.add_argument('--artnet_rate', type=float, default=40)
+    parser.add_argument('--artnet_keep_alive', type=float, default=1.0)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    app_args = app.get_args([
+        '--device', *args.video,
+        '--pipeline',
+        '--headless',
+        '--ip', '127.0.0.1',
+        '--port', str(args.port),
+        '--backend', args.backend,
+        '--max_num_hands', str(args.max_num_hands),
+        '--artnet_rate', str(args.artnet_rate),
+        '--artnet_keep_alive', str(args.artnet_keep_alive),
+    ])
+
+    listener = ArtnetListener('127.0.0.1', args.port)
+    listener.start()
+
+    latencies = []
+
+    def on_packet(capture_time, send_time):
+        latencies.append((send_time - capture_time) * 1000.0)
+
+    shutdown_event = threading.Event()
+    if args.duration > 0:
+        threading.Timer(args.duration, shutdown_event.set).start()
+
+    try:
+        app.main_pipeline(app_args, time.time(), shutdown_event,
+                          on_packet=on_packet)
+        # Let the last packets arrive
+        time.sleep(0.2)
+    finally:
+        shutdown_event.set()
+        listener.stop()
+        listener.join()
+
+    print()
+    print(f'Packets received: {listener.packet_count} '
+          f'({listener.packet_rate():.1f} packets/s, '
+          f'{listener.invalid_count} invalid)')
+    if len(latencies) == 0:
+        print('No new values were sent, is there a hand in the video?')
+        return
+
+    latencies = np.array(latencies)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f'Capture to packet ({len(latencies)} updates): '
+          f'p50 {p50:.2f} ms, p95 {p95:.2f} ms, p99 {p99:.2f} ms, '
+          f'max {latencies.max():.2f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Cold start time, memory and per-call latency of each inference backend.
+
+Every backend is measured in a fresh interpreter process so that import
+cost and resident memory are not shared between them.
+
+    python -m benchmarks.backend_benchmark
+"""
+import argparse
+import json
+import subprocess
+import sys
+
+from model.backends import BACKENDS
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+
+import numpy as np
+from model import KeyPointClassifier, PointHistoryClassifier
+
+backend = sys.argv[1]
+keypoint_classifier = KeyPointClassifier(backend=backend)
+point_history_classifier = PointHistoryClassifier(backend=backend)
+keypoint = np.zeros(21 * 2, dtype=np.float32)
+point_history = np.zeros(16 * 2, dtype=np.float32)
+keypoint_classifier(keypoint)
+point_history_classifier(point_history)
+startup = time.perf_counter() - start
+
+iterations = int(sys.argv[2])
+start = time.perf_counter()
+for _ in range(iterations):
+    keypoint_classifier(keypoint)
+    point_history_classifier(point_history)
+latency = (time.perf_counter() - start) / iterations
+
+# ru_maxrss is KiB on Linux
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+print(json.dumps({"startup": startup, "rss": rss, "latency": latency}))
+"""
+
+
+def run_backend(backend, iterations):
+    completed = subprocess.run(
+        [sys.executable, "-c", CHILD, backend, str(iterations)],
+        capture_output=True, text=True)
+    if completed.returncode != 0:
+        error = completed.stderr.strip().splitlines()
+        return None, error[-1] if error else "failed"
+    return json.loads(completed.stdout.strip().splitlines()[-1]), None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS))
+    parser.add_argument("--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    print(f"{'backend':<16}{'startup s':>10}{'max RSS MB':>12}{'both us':>10}")
+    for backend in args.backends:
+        result, error = run_backend(backend, args.iterations)
+        if result is None:
+            print(f"{backend:<16}  unavailable: {error}")
+            continue
+        print(f"{backend:<16}{result['startup']:>10.2f}{result['rss']:>12.1f}"
+              f"{result['latency'] * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
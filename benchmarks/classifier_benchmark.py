@@ -0,0 +1,110 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Per-call latency and transient allocations of the TFLite classifiers.
+
+Compares the previous set_tensor/get_tensor invocation against the
+in-place fast path of KeyPointClassifier / PointHistoryClassifier, and
+per-hand calls against one classify_batch() invoke for N hands.
+
+    python -m benchmarks.classifier_benchmark --iterations 10000
+"""
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+
+from model import KeyPointClassifier
+from model import PointHistoryClassifier
+
+
+def legacy_call(classifier, feature_list):
+    # Invocation as done before the fast path: new input array, index
+    # lookup and set_tensor/get_tensor copies on every call
+    backend = classifier.backend
+    input_details_tensor_index = backend.input_details[0]['index']
+    backend.interpreter.set_tensor(
+        input_details_tensor_index,
+        np.array([feature_list], dtype=np.float32))
+    backend.interpreter.invoke()
+
+    output_details_tensor_index = backend.output_details[0]['index']
+
+    result = backend.interpreter.get_tensor(output_details_tensor_index)
+
+    return np.argmax(np.squeeze(result))
+
+
+def measure_latency(func, feature, iterations):
+    for _ in range(100):
+        func(feature)
+
+    elapsed = np.empty(iterations, dtype=np.float64)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(feature)
+        elapsed[i] = time.perf_counter() - start
+    elapsed *= 1e6
+    return np.mean(elapsed), np.percentile(elapsed, 50), np.percentile(elapsed, 99)
+
+
+def measure_allocations(func, feature, iterations):
+    # Everything a call allocates is freed before it returns, so report the
+    # transient peak above the baseline instead of live memory.
+    tracemalloc.start()
+    func(feature)
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(iterations):
+        func(feature)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak - baseline
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10000)
+    parser.add_argument("--batch_sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    cases = [
+        ("KeyPointClassifier", KeyPointClassifier(),
+         rng.uniform(-1, 1, 21 * 2).astype(np.float32)),
+        ("PointHistoryClassifier", PointHistoryClassifier(),
+         rng.uniform(-0.1, 0.1, 16 * 2).astype(np.float32)),
+    ]
+
+    print(f"{'classifier':<24}{'path':<8}{'mean us':>10}{'p50 us':>10}"
+          f"{'p99 us':>10}{'peak B':>10}")
+    for name, classifier, feature in cases:
+        for path, func in (
+            ("legacy", lambda x, c=classifier: legacy_call(c, x)),
+            ("fast", classifier),
+        ):
+            mean, p50, p99 = measure_latency(func, feature, args.iterations)
+            peak = measure_allocations(func, feature, 1000)
+            print(f"{name:<24}{path:<8}{mean:>10.2f}{p50:>10.2f}"
+                  f"{p99:>10.2f}{peak:>10d}")
+
+    print()
+    print(f"{'classifier':<24}{'hands':>6}{'per-hand us':>14}{'batch us':>12}")
+    for name, classifier, feature in cases:
+        for batch_size in args.batch_sizes:
+            batch = np.repeat(feature[None], batch_size, axis=0)
+
+            def per_hand(x, c=classifier):
+                for row in x:
+                    c(row)
+
+            iterations = max(100, args.iterations // batch_size)
+            sequential, _, _ = measure_latency(per_hand, batch, iterations)
+            batched, _, _ = measure_latency(
+                classifier.classify_batch, batch, iterations)
+            print(f"{name:<24}{batch_size:>6}{sequential:>14.2f}{batched:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
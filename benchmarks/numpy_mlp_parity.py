@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Latency of the NumPy and ONNX backends against the TFLite models.
+
+Times single-row and full batch inference on the rows of the training
+datasets (random rows without the CSV) and prints the largest probability
+difference to the shipped .tflite for reference. The onnx backend is
+skipped when onnxruntime or the .onnx file is missing. The parity check
+on recorded rows is tools/check_parity.py.
+
+    python -m benchmarks.numpy_mlp_parity
+
+The NumPy backend starts without TensorFlow and with a much smaller RSS
+(benchmarks/backend_benchmark.py), but a single-row call costs several
+times a TFLite invoke: it is not the low-latency choice.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from model.backends import NumpyBackend
+from model.backends import OnnxBackend
+from model.backends import TFLiteBackend
+
+MODELS = [
+    ('keypoint', 'model/keypoint_classifier/keypoint_classifier',
+     'model/keypoint_classifier/keypoint.csv'),
+    ('point_history', 'model/point_history_classifier/point_history_classifier',
+     'model/point_history_classifier/point_history.csv'),
+]
+
+
+def time_per_call(func, arg, iterations):
+    for _ in range(100):
+        func(arg)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func(arg)
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--iterations", type=int, default=10000)
+    args = parser.parse_args()
+
+    for name, model_base, dataset in MODELS:
+        tflite_backend = TFLiteBackend(model_base + '.tflite')
+        backends = [("numpy", NumpyBackend(model_base + '.tflite'))]
+        if not os.path.exists(model_base + '.onnx'):
+            print(f"{name}: {model_base}.onnx not found, skipping onnx")
+        else:
+            try:
+                backends.append(("onnx", OnnxBackend(model_base + '.onnx')))
+            except ImportError:
+                print(f"{name}: onnxruntime not installed, skipping onnx")
+
+        if os.path.exists(dataset):
+            X = np.loadtxt(dataset, delimiter=',', dtype=np.float32)[:, 1:]
+        else:
+            # Features are max-abs normalized, so [-1, 1] covers the input range
+            print(f"{name}: {dataset} not found, using random inputs")
+            rng = np.random.default_rng(0)
+            X = rng.uniform(-1, 1, (5000, tflite_backend.input_width)).astype(np.float32)
+        tflite_result = np.array(tflite_backend.invoke(X))
+
+        print(f"{name}: {len(X)} rows")
+        for label, backend in backends:
+            result = np.array(backend.invoke(X))
+            max_diff = np.abs(result - tflite_result).max()
+            agreement = np.mean(result.argmax(axis=1) == tflite_result.argmax(axis=1))
+            print(f"  {label:<7} class agreement {agreement:.4f}, "
+                  f"max prob diff {max_diff:.2e}")
+
+        for label, backend in (*backends, ("tflite", tflite_backend)):
+            single = time_per_call(backend.invoke_one, X[0], args.iterations)
+            batch = time_per_call(backend.invoke, X, 20)
+            print(f"  {label:<7} single row {single:8.2f} us   "
+                  f"batch of {len(X)} {batch:10.2f} us")
+
+
+if __name__ == "__main__":
+    main()
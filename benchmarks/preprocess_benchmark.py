@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Per-step time of the frame preprocessing paths in front of MediaPipe.
+
+Runs the same frames through
+  original: cv.flip, copy.deepcopy and cv.cvtColor of a new frame each time
+  display:  in-place cv.flip for the debug image, then utils.FramePreprocessor
+  headless: utils.FramePreprocessor on the unflipped frame, landmarks
+            mirrored with utils.mirror_results
+and prints the mean time of every step in ms.
+
+    python -m benchmarks.preprocess_benchmark --video hands.mp4
+    python -m benchmarks.preprocess_benchmark --inference_width 320
+
+Without --video, random frames of --width x --height are used; MediaPipe
+then runs its palm detector on every frame instead of tracking a hand.
+"""
+import argparse
+import copy
+import time
+from collections import defaultdict
+
+import cv2 as cv
+import numpy as np
+
+import app
+from utils import FramePreprocessor
+from utils import mirror_results
+
+PATHS = ('original', 'display', 'headless')
+STEPS = ('flip', 'deepcopy', 'cvtColor', 'preprocess', 'mediapipe', 'mirror')
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--video', type=str, default=None)
+    parser.add_argument('--width', type=int, default=720)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--inference_width', type=int, default=0)
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--max_num_hands', type=int, default=1)
+    return parser.parse_args()
+
+
+def load_frames(args):
+    if args.video is None:
+        rng = np.random.default_rng(0)
+        return [
+            rng.integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+            for _ in range(args.frames)
+        ]
+
+    cap = cv.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise FileNotFoundError(f'Cannot open video {args.video}')
+    frames = []
+    while len(frames) < args.frames:
+        ret, image = cap.read()
+        if not ret:
+            break
+        frames.append(image)
+    cap.release()
+    return frames
+
+
+def run_path(path, frames, hands, preprocess):
+    times = defaultdict(float)
+
+    def step(name, func, *func_args):
+        start = time.perf_counter()
+        result = func(*func_args)
+        times[name] += time.perf_counter() - start
+        return result
+
+    for image in frames:
+        if path == 'original':
+            image = step('flip', cv.flip, image, 1)
+            step('deepcopy', copy.deepcopy, image)
+            image = step('cvtColor', cv.cvtColor, image, cv.COLOR_BGR2RGB)
+            image.flags.writeable = False
+            step('mediapipe', hands.process, image)
+        elif path == 'display':
+            # The app flips the frame it just read; keep the loaded frames intact
+            image = image.copy()
+            step('flip', cv.flip, image, 1, image)
+            image = step('preprocess', preprocess, image)
+            step('mediapipe', hands.process, image)
+        else:
+            image = step('preprocess', preprocess, image)
+            results = step('mediapipe', hands.process, image)
+            step('mirror', mirror_results, results)
+
+    return {name: elapsed * 1000.0 / len(frames) for name, elapsed in times.items()}
+
+
+def main():
+    args = get_args()
+    app_args = app.get_args(['--max_num_hands', str(args.max_num_hands)])
+
+    frames = load_frames(args)
+    if len(frames) == 0:
+        raise SystemExit('No frames')
+    height, width = frames[0].shape[:2]
+
+    results = {}
+    for path in PATHS:
+        hands = app.create_mediapipe_hands(app_args)
+        preprocess = FramePreprocessor(args.inference_width)
+        # Warm-up, also allocates the reused buffers
+        run_path(path, frames[:10], hands, preprocess)
+        results[path] = run_path(path, frames, hands, preprocess)
+        hands.close()
+
+    inference_width = args.inference_width or width
+    print(f'{len(frames)} frames of {width}x{height}, '
+          f'inference width {inference_width}, mean ms per frame')
+    print(f"{'step':<12}" + ''.join(f'{path:>10}' for path in PATHS))
+    for name in STEPS:
+        row = [results[path].get(name) for path in PATHS]
+        print(f'{name:<12}' + ''.join(
+            f'{"-":>10}' if value is None else f'{value:>10.3f}' for value in row))
+    print(f"{'total':<12}" + ''.join(
+        f'{sum(results[path].values()):>10.3f}' for path in PATHS))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Accuracy and cost of the pointer filters in utils/smoothing.py.
+
+A synthetic fingertip (at rest, then a sine sweep) is sampled at --fps
+with Gaussian pixel noise, and every Art-Net refresh tick (--rate) the
+pointer is sent --latency ms after the capture of the last frame. For
+raw coordinates, OneEuroFilter and KalmanFilter the RMS error against
+the true position at send time is printed, without and with prediction
+to the send time. The second table is the time of one update() plus
+predict() for N points at once.
+
+    python -m benchmarks.smoothing_benchmark --latency 60 --noise 3
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils import KalmanFilter
+from utils import OneEuroFilter
+
+FILTERS = ('raw', 'one_euro', 'kalman')
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--fps', type=float, default=30.0)
+    parser.add_argument('--rate', type=float, default=40.0)
+    parser.add_argument('--latency', type=float, default=60.0)
+    parser.add_argument('--noise', type=float, default=3.0)
+    parser.add_argument('--seconds', type=float, default=20.0)
+    parser.add_argument('--iterations', type=int, default=2000)
+    return parser.parse_args()
+
+
+def create_filter(name):
+    if name == 'one_euro':
+        return OneEuroFilter()
+    if name == 'kalman':
+        return KalmanFilter()
+    return None
+
+
+def trajectory(t):
+    # Still for the first half, then 0.5 Hz sweeps over 400 pixels
+    moving = t >= 0.0
+    x = np.where(moving, 360 + 200 * np.sin(np.pi * t), 360)
+    return np.stack([x, np.full_like(x, 275)], axis=-1)
+
+
+def run_accuracy(name, args, rng):
+    point_filter = create_filter(name)
+    latency = args.latency / 1000.0
+    capture_times = np.arange(-args.seconds / 2, args.seconds / 2, 1 / args.fps)
+    measured = trajectory(capture_times) + rng.normal(0, args.noise, (len(capture_times), 2))
+
+    errors = {'still': ([], []), 'moving': ([], [])}
+    frame = 0
+    pointer = None
+    for send_time in np.arange(capture_times[0] + latency, capture_times[-1], 1 / args.rate):
+        # Frames whose results reached the output by this tick
+        while frame < len(capture_times) and capture_times[frame] + latency <= send_time:
+            values = measured[frame:frame + 1]
+            if point_filter is not None:
+                values = point_filter.update(values, capture_times[frame])
+            pointer = values.copy()
+            frame += 1
+        if pointer is None or 0.0 <= send_time < 0.5:
+            continue  # Nothing yet / start of the movement
+
+        predicted = pointer if point_filter is None else point_filter.predict(send_time)
+        true = trajectory(np.array([send_time]))
+        phase = 'moving' if send_time >= 0.5 else 'still'
+        errors[phase][0].append(np.linalg.norm(pointer - true))
+        errors[phase][1].append(np.linalg.norm(predicted - true))
+
+    def rms(values):
+        return float(np.sqrt(np.mean(np.square(values))))
+
+    return [rms(values) for phase in ('still', 'moving') for values in errors[phase]]
+
+
+def measure_cost(name, points, iterations):
+    point_filter = create_filter(name)
+    rng = np.random.default_rng(0)
+    values = rng.uniform(0, 720, (points, 2))
+    for i in range(10):
+        point_filter.update(values, i / 30)
+    start = time.perf_counter()
+    for i in range(10, iterations + 10):
+        point_filter.update(values, i / 30)
+        point_filter.predict(i / 30 + 0.05)
+    return (time.perf_counter() - start) * 1e6 / iterations
+
+
+def main():
+    args = get_args()
+    rng = np.random.default_rng(0)
+
+    print(f'{args.fps:g} fps, {args.rate:g} Hz refresh, {args.latency:g} ms latency, '
+          f'noise {args.noise:g} px; RMS error in px at send time')
+    print(f"{'filter':<10}{'still':>10}{'still+pred':>12}{'moving':>10}{'moving+pred':>13}")
+    for name in FILTERS:
+        still, still_predicted, moving, moving_predicted = run_accuracy(name, args, rng)
+        print(f'{name:<10}{still:>10.2f}{still_predicted:>12.2f}'
+              f'{moving:>10.2f}{moving_predicted:>13.2f}')
+
+    print()
+    print('update + predict, us per call')
+    counts = (1, 21, 100, 1000)
+    print(f"{'filter':<10}" + ''.join(f'{f"N={count}":>10}' for count in counts))
+    for name in FILTERS[1:]:
+        print(f'{name:<10}' + ''.join(
+            f'{measure_cost(name, count, args.iterations):>10.1f}' for count in counts))
+
+
+if __name__ == '__main__':
+    main()
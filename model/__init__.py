@@ -1,2 +1,5 @@
 from model.keypoint_classifier.keypoint_classifier import KeyPointClassifier
-from model.point_history_classifier.point_history_classifier import PointHistoryClassifier
\ No newline at end of file
+from model.point_history_classifier.point_history_classifier import PointHistoryClassifier
+from model.backends import BACKENDS
+from model.backends import QUANTIZATIONS
+from model.backends import load_backend
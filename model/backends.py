@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+
+import numpy as np
+
+# Runtimes are imported lazily inside each backend so that selecting a light
+# backend never pulls TensorFlow into the process.
+BACKENDS = ('tflite', 'tflite_runtime', 'onnx', 'numpy')
+# Variants of the .tflite models written by tools/quantize.py
+QUANTIZATIONS = ('none', 'float16', 'int8')
+
+
+def load_backend(model_path, backend='tflite', num_threads=1,
+                 quantization='none'):
+    """Create an inference backend for a classifier model.
+
+    model_path is the classifier's .tflite path. The onnx backend uses the
+    .onnx file next to it (converted from the .tflite) and the numpy backend
+    reads its weights from the .tflite, so every backend runs the same
+    float32 model. quantization selects a float16 / int8 variant of the
+    .tflite model (tflite backends only).
+    """
+    if quantization != 'none':
+        if backend not in ('tflite', 'tflite_runtime'):
+            raise ValueError(
+                f"Quantization '{quantization}' needs a tflite backend")
+        model_path = quantized_model_path(model_path, quantization)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found, create it with tools/quantize.py")
+    if backend == 'tflite':
+        return TFLiteBackend(model_path, num_threads=num_threads)
+    if backend == 'tflite_runtime':
+        return TFLiteBackend(model_path, num_threads=num_threads,
+                             runtime='tflite_runtime')
+    if backend == 'onnx':
+        return OnnxBackend(_sibling(model_path, '.onnx'),
+                           num_threads=num_threads)
+    if backend == 'numpy':
+        return NumpyBackend(model_path)
+    raise ValueError(f"Unknown backend '{backend}', expected one of {BACKENDS}")
+
+
+def _sibling(model_path, extension):
+    return os.path.splitext(model_path)[0] + extension
+
+
+def quantized_model_path(model_path, quantization):
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(
+            f"Unknown quantization '{quantization}', expected one of {QUANTIZATIONS}")
+    if quantization == 'none':
+        return model_path
+    return _sibling(model_path, f'_{quantization}.tflite')
+
+
+class TFLiteBackend(object):
+    """TFLite interpreter from tensorflow.lite or tflite_runtime.
+
+    invoke()/invoke_one() return a view of the output tensor that is only
+    valid until the next call.
+    """
+
+    def __init__(self, model_path, num_threads=1, runtime='tensorflow'):
+        if runtime == 'tflite_runtime':
+            import tflite_runtime.interpreter as tflite
+        else:
+            import tensorflow.lite as tflite
+
+        self.interpreter = tflite.Interpreter(model_path=model_path,
+                                              num_threads=num_threads)
+
+        self.interpreter.allocate_tensors()
+        self.input_details = self.interpreter.get_input_details()
+        self.output_details = self.interpreter.get_output_details()
+
+        # Cached tensor indices and accessors returning views of the
+        # interpreter's own input/output buffers. Views must not be held
+        # across invoke(), so only the accessors are stored.
+        self._input_index = self.input_details[0]['index']
+        self._output_index = self.output_details[0]['index']
+        self._input_tensor = self.interpreter.tensor(self._input_index)
+        self._output_tensor = self.interpreter.tensor(self._output_index)
+        self.input_width = self.input_details[0]['shape'][1]
+        self._batch_size = 1
+
+    def invoke_one(self, row):
+        if self._batch_size != 1:
+            self._resize_batch(1)
+
+        # Write straight into the input buffer and read the output in place
+        self._input_tensor()[0] = row
+        self.interpreter.invoke()
+
+        return self._output_tensor()[0]
+
+    def invoke(self, batch):
+        # One invoke for all rows; the input tensor is only resized when the
+        # number of rows changes
+        batch_size = len(batch)
+        if batch_size != self._batch_size:
+            self._resize_batch(batch_size)
+
+        # Write straight into the input buffer and read the output in place
+        self._input_tensor()[:] = batch
+        self.interpreter.invoke()
+
+        return self._output_tensor()
+
+    def _resize_batch(self, batch_size):
+        self.interpreter.resize_tensor_input(
+            self._input_index, [batch_size, self.input_width])
+        self.interpreter.allocate_tensors()
+        self._batch_size = batch_size
+
+
+class OnnxBackend(object):
+    def __init__(self, model_path, num_threads=1):
+        import onnxruntime as ort
+
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(
+                f"{model_path} not found, create it with tools/convert_onnx.py")
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads
+        options.inter_op_num_threads = num_threads
+        self.session = ort.InferenceSession(
+            model_path, sess_options=options,
+            providers=['CPUExecutionProvider'])
+
+        model_input = self.session.get_inputs()[0]
+        self._input_name = model_input.name
+        self._output_names = [self.session.get_outputs()[0].name]
+        self.input_width = model_input.shape[1]
+
+    def invoke_one(self, row):
+        return self.invoke(np.asarray(row, dtype=np.float32).reshape(1, -1))[0]
+
+    def invoke(self, batch):
+        batch = np.asarray(batch, dtype=np.float32)
+        return self.session.run(self._output_names, {self._input_name: batch})[0]
+
+
+def load_dense_layers(model_path, cache=True):
+    """Read the fully connected layers of a float32 .tflite model as
+    (kernel, bias, activation).
+
+    These are the same weights the tflite and onnx backends run. The
+    contiguous float32 weights are cached in a .npz next to the model,
+    keyed by the .tflite content hash, so later loads need no TensorFlow.
+    """
+    with open(model_path, 'rb') as f:
+        model_data = f.read()
+    model_hash = hashlib.sha1(model_data).hexdigest()
+
+    cache_path = _sibling(model_path, '.npz')
+    if cache and os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            if str(data['model_hash']) == model_hash:
+                activations = [str(a) for a in data['activations']]
+                return [
+                    (data[f'kernel_{i}'], data[f'bias_{i}'], activation)
+                    for i, activation in enumerate(activations)
+                ]
+
+    layers = _read_tflite_layers(model_path, model_data)
+
+    if cache:
+        arrays = {}
+        for i, (kernel, bias, _) in enumerate(layers):
+            arrays[f'kernel_{i}'] = kernel
+            arrays[f'bias_{i}'] = bias
+        try:
+            np.savez(cache_path, model_hash=model_hash,
+                     activations=[activation for _, _, activation in layers],
+                     **arrays)
+        except OSError:
+            pass  # Read-only model directory, parse the .tflite every time
+
+    return layers
+
+
+def _read_tflite_layers(model_path, model_data):
+    # The flatbuffer schema ships with TensorFlow; it is only needed when
+    # the .npz cache is missing or stale
+    from tensorflow.lite.python import schema_py_generated as schema
+
+    model = schema.ModelT.InitFromObj(schema.Model.GetRootAsModel(model_data, 0))
+    graph = model.subgraphs[0]
+    operators = {code: name for name, code in vars(schema.BuiltinOperator).items()
+                 if not name.startswith('_')}
+    activations = {schema.ActivationFunctionType.NONE: 'linear',
+                   schema.ActivationFunctionType.RELU: 'relu'}
+
+    def constant(index):
+        tensor = graph.tensors[index]
+        if tensor.type != schema.TensorType.FLOAT32:
+            raise ValueError(
+                f"{model_path}: tensor {tensor.name} is not float32, "
+                "quantized models are not supported")
+        data = np.frombuffer(bytes(model.buffers[tensor.buffer].data), dtype=np.float32)
+        return data.reshape(tensor.shape)
+
+    layers = []
+    x = graph.inputs[0]
+    for op in graph.operators:
+        code = model.operatorCodes[op.opcodeIndex]
+        operator = operators.get(max(code.builtinCode, code.deprecatedBuiltinCode))
+        if op.inputs[0] != x:
+            raise ValueError(f"{model_path}: only sequential models are supported")
+        x = op.outputs[0]
+
+        if operator == 'FULLY_CONNECTED':
+            activation = activations.get(op.builtinOptions.fusedActivationFunction)
+            if activation is None:
+                raise ValueError(
+                    f"{model_path}: unsupported fused activation "
+                    f"{op.builtinOptions.fusedActivationFunction}")
+            # Weights are stored (units, inputs)
+            kernel = np.ascontiguousarray(constant(op.inputs[1]).T)
+            units = kernel.shape[1]
+            if len(op.inputs) > 2 and op.inputs[2] >= 0:
+                bias = constant(op.inputs[2]).copy()
+            else:
+                bias = np.zeros(units, dtype=np.float32)
+            layers.append((kernel, bias, activation))
+        elif (operator == 'SOFTMAX' and layers and layers[-1][2] == 'linear'
+              and op.builtinOptions.beta == 1.0):
+            layers[-1] = (layers[-1][0], layers[-1][1], 'softmax')
+        else:
+            raise ValueError(f"{model_path}: unsupported operator {operator}")
+
+    if x != graph.outputs[0]:
+        raise ValueError(f"{model_path}: only sequential models are supported")
+    return layers
+
+
+class NumpyBackend(object):
+    """Evaluates the fully connected layers of the float32 .tflite model
+    with NumPy.
+
+    invoke_one() reuses preallocated activation buffers; its result is only
+    valid until the next call.
+    """
+
+    ACTIVATIONS = ('linear', 'relu', 'softmax')
+
+    def __init__(self, model_path):
+        self.layers = load_dense_layers(model_path)
+        self.input_width = self.layers[0][0].shape[0]
+
+        self._buffers = [
+            np.empty(kernel.shape[1], dtype=np.float32)
+            for kernel, _, _ in self.layers
+        ]
+        # np.maximum against a preallocated array is faster than a scalar 0
+        self._zeros = [np.zeros_like(buffer) for buffer in self._buffers]
+
+    def invoke_one(self, row):
+        x = np.asarray(row, dtype=np.float32)
+        for (kernel, bias, activation), out, zeros in zip(
+            self.layers, self._buffers, self._zeros
+        ):
+            np.dot(x, kernel, out=out)
+            out += bias
+            # 1-D specialisation of _activate, avoids the axis/keepdims cost
+            if activation == 'relu':
+                np.maximum(out, zeros, out=out)
+            elif activation == 'softmax':
+                out -= out.max()
+                np.exp(out, out=out)
+                out /= out.sum()
+            x = out
+        return x
+
+    def invoke(self, batch):
+        x = np.asarray(batch, dtype=np.float32)
+        for kernel, bias, activation in self.layers:
+            x = x @ kernel
+            x += bias
+            if activation == 'relu':
+                np.maximum(x, 0, out=x)
+            elif activation == 'softmax':
+                x -= x.max(axis=-1, keepdims=True)
+                np.exp(x, out=x)
+                x /= x.sum(axis=-1, keepdims=True)
+        return x
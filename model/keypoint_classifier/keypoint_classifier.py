@@ -1,36 +1,57 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import numpy as np
-#import tflite_runtime.interpreter as tflite
-import tensorflow.lite as tflite
+
+from model.backends import load_backend
+
 
 class KeyPointClassifier(object):
     def __init__(
         self,
         model_path='model/keypoint_classifier/keypoint_classifier.tflite',
         num_threads=1,
+        backend='tflite',
+        quantization='none',
     ):
-        self.interpreter = tflite.Interpreter(model_path=model_path,
-                                               num_threads=num_threads)
-
-        self.interpreter.allocate_tensors()
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        self.backend = load_backend(model_path, backend=backend,
+                                    num_threads=num_threads,
+                                    quantization=quantization)
 
     def __call__(
         self,
         landmark_list,
     ):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([landmark_list], dtype=np.float32))
-        self.interpreter.invoke()
+        result = self.predict(landmark_list)
 
-        output_details_tensor_index = self.output_details[0]['index']
+        result_index = int(result.argmax())
 
-        result = self.interpreter.get_tensor(output_details_tensor_index)
+        return result_index
 
-        result_index = np.argmax(np.squeeze(result))
+    def predict(
+        self,
+        landmark_list,
+    ):
+        # Probabilities of one row; a view of the backend output that is
+        # only valid until the next call
+        return self.backend.invoke_one(landmark_list)
+
+    def classify_batch(
+        self,
+        landmark_batch,
+    ):
+        if len(landmark_batch) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        result = self.predict_batch(landmark_batch)
+
+        result_index = result.argmax(axis=1)
 
         return result_index
+
+    def predict_batch(
+        self,
+        landmark_batch,
+    ):
+        # (N, classes) probabilities; a view of the backend output that is
+        # only valid until the next call
+        return self.backend.invoke(landmark_batch)
@@ -1,8 +1,8 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 import numpy as np
-#import tflite_runtime.interpreter as tflite
-import tensorflow.lite as tflite
+
+from model.backends import load_backend
 
 
 class PointHistoryClassifier(object):
@@ -12,13 +12,12 @@ class PointHistoryClassifier(object):
         score_th=0.5,
         invalid_value=0,
         num_threads=1,
+        backend='tflite',
+        quantization='none',
     ):
-        self.interpreter = tflite.Interpreter(model_path=model_path,
-                                               num_threads=num_threads)
-
-        self.interpreter.allocate_tensors()
-        self.input_details = self.interpreter.get_input_details()
-        self.output_details = self.interpreter.get_output_details()
+        self.backend = load_backend(model_path, backend=backend,
+                                    num_threads=num_threads,
+                                    quantization=quantization)
 
         self.score_th = score_th
         self.invalid_value = invalid_value
@@ -27,19 +26,41 @@ class PointHistoryClassifier(object):
         self,
         point_history,
     ):
-        input_details_tensor_index = self.input_details[0]['index']
-        self.interpreter.set_tensor(
-            input_details_tensor_index,
-            np.array([point_history], dtype=np.float32))
-        self.interpreter.invoke()
+        result = self.predict(point_history)
 
-        output_details_tensor_index = self.output_details[0]['index']
+        result_index = int(result.argmax())
 
-        result = self.interpreter.get_tensor(output_details_tensor_index)
+        if result.item(result_index) < self.score_th:
+            result_index = self.invalid_value
 
-        result_index = np.argmax(np.squeeze(result))
+        return result_index
 
-        if np.squeeze(result)[result_index] < self.score_th:
-            result_index = self.invalid_value
+    def classify_batch(
+        self,
+        point_history_batch,
+    ):
+        if len(point_history_batch) == 0:
+            return np.empty(0, dtype=np.int64)
+
+        result = self.predict_batch(point_history_batch)
+
+        result_index = result.argmax(axis=1)
+
+        result_index[result.max(axis=1) < self.score_th] = self.invalid_value
 
         return result_index
+
+    def predict(
+        self,
+        point_history,
+    ):
+        # Probabilities of one row, without score_th; a view of the backend
+        # output that is only valid until the next call
+        return self.backend.invoke_one(point_history)
+
+    def predict_batch(
+        self,
+        point_history_batch,
+    ):
+        # (N, classes) probabilities, without score_th; same lifetime
+        return self.backend.invoke(point_history_batch)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Local Art-Net receiver standing in for a console or node.
+
+Prints the packet rate and the latest DMX values of each universe:
+
+    python -m tools.artnet_listener --port 6454
+    python app.py --ip 127.0.0.1 --port 6454
+"""
+import argparse
+import socket
+import threading
+import time
+from collections import deque
+
+ARTNET_HEADER = b'Art-Net\x00'
+OP_DMX = 0x5000
+
+
+def parse_artdmx(packet):
+    """Return (universe, sequence, data) of an ArtDMX packet, else None."""
+    if len(packet) < 18 or not packet.startswith(ARTNET_HEADER):
+        return None
+    if int.from_bytes(packet[8:10], 'little') != OP_DMX:
+        return None
+
+    sequence = packet[12]
+    universe = int.from_bytes(packet[14:16], 'little')
+    length = int.from_bytes(packet[16:18], 'big')
+    return universe, sequence, bytes(packet[18:18 + length])
+
+
+class ArtnetListener(threading.Thread):
+    """Receives ArtDMX packets on a UDP port in a background thread.
+
+    packets keeps (receive_time, universe, sequence, data) of the latest
+    packets, receive_time from time.perf_counter().
+    """
+
+    def __init__(self, host='127.0.0.1', port=6454, history=100000):
+        super().__init__(name='artnet_listener', daemon=True)
+        self._socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._socket.bind((host, port))
+        self._socket.settimeout(0.1)
+        self._stop_event = threading.Event()
+
+        self.packets = deque(maxlen=history)
+        self.packet_count = 0
+        self.invalid_count = 0
+        self.universes = {}  # universe -> latest data
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                try:
+                    packet = self._socket.recv(1024)
+                except socket.timeout:
+                    continue
+                receive_time = time.perf_counter()
+
+                parsed = parse_artdmx(packet)
+                if parsed is None:
+                    self.invalid_count += 1
+                    continue
+                universe, sequence, data = parsed
+                self.packets.append((receive_time, universe, sequence, data))
+                self.universes[universe] = data
+                self.packet_count += 1
+        finally:
+            self._socket.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+    def packet_rate(self):
+        # Packets per second over the received span
+        if len(self.packets) < 2:
+            return 0.0
+        span = self.packets[-1][0] - self.packets[0][0]
+        return (len(self.packets) - 1) / span if span > 0 else 0.0
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--host', type=str, default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6454)
+    parser.add_argument('--channels', help='Channels shown per universe',
+                        type=int, default=8)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    listener = ArtnetListener(args.host, args.port)
+    listener.start()
+    print(f'Listening on {args.host}:{args.port}, Ctrl+C to stop')
+
+    try:
+        last_count = 0
+        while True:
+            time.sleep(1.0)
+            count = listener.packet_count
+            values = {
+                universe: list(data[:args.channels])
+                for universe, data in sorted(listener.universes.items())
+            }
+            print(f'{count - last_count:4d} packets/s', values)
+            last_count = count
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+        listener.join()
+
+
+if __name__ == '__main__':
+    main()
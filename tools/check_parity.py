@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Check that every inference backend classifies recorded hands like tflite.
+
+The rows are recorded data only, never random:
+
+* the dataset CSVs (model/*/keypoint.csv, point_history.csv), whose rows
+  are already preprocessed;
+* landmark caches / streams written by tools/extract_landmarks.py
+  (--landmark_cache), turned into classifier inputs with the same
+  functions as app.py (calc_landmark_points, pre_process_landmark,
+  pre_process_point_history), so preprocessing and layout are covered.
+
+Each row goes through the classifier classes of app.py with every
+available backend (numpy; onnx and tflite_runtime when installed) and
+tflite. Exits with status 1 when a backend predicts another class for
+any row or a probability differs by more than --atol. A classifier
+without recorded rows is reported as not checked; --require_all turns
+that into a failure.
+
+    python -m tools.check_parity
+    python -m tools.check_parity --landmark_cache session_cache --require_all
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+
+from model import KeyPointClassifier
+from model import PointHistoryClassifier
+from utils import LandmarkReplay
+from utils import load_dataset
+from utils.landmarks import calc_landmark_points
+from utils.landmarks import pre_process_landmark
+from utils.landmarks import pre_process_point_history
+
+CLASSIFIERS = {
+    'keypoint': (KeyPointClassifier, 'model/keypoint_classifier/keypoint.csv', 21 * 2),
+    'point_history': (PointHistoryClassifier,
+                      'model/point_history_classifier/point_history.csv', 16 * 2),
+}
+HISTORY_LENGTH = 16
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--landmark_cache', help='Recorded landmarks, may be repeated',
+                        action='append', default=[])
+    parser.add_argument('--atol', type=float, default=1e-5)
+    parser.add_argument('--require_all', help='Fail when a classifier has no recorded rows',
+                        action='store_true')
+    return parser.parse_args()
+
+
+def recorded_rows(path):
+    # Keypoint rows of every hand and point history rows of the first
+    # hand, as GestureRecognizer builds them
+    replay = LandmarkReplay(path, realtime=False)
+    keypoint_rows = []
+    point_history_rows = []
+    fingertips = []
+    for frame_id in range(len(replay)):
+        hand_count = int(replay.hand_count[frame_id])
+        if hand_count == 0:
+            fingertips = []
+            continue
+        for landmark_array in replay.landmarks[frame_id, :hand_count]:
+            landmark_list = calc_landmark_points(landmark_array, replay.width, replay.height)
+            keypoint_rows.append(pre_process_landmark(landmark_list))
+        first = calc_landmark_points(replay.landmarks[frame_id, 0], replay.width, replay.height)
+        fingertips.append(first[8])
+        if len(fingertips) >= HISTORY_LENGTH:
+            point_history_rows.append(pre_process_point_history(
+                fingertips[-HISTORY_LENGTH:], replay.width, replay.height))
+    return {'keypoint': keypoint_rows, 'point_history': point_history_rows}
+
+
+def available_backends():
+    backends = ['numpy']
+    for backend, module in (('onnx', 'onnxruntime'), ('tflite_runtime', 'tflite_runtime')):
+        try:
+            __import__(module)
+        except ImportError:
+            print(f'{backend}: {module} not installed, not checked')
+            continue
+        backends.append(backend)
+    return backends
+
+
+def check(classifier_class, rows, backends, atol):
+    reference = np.array(classifier_class(backend='tflite').predict_batch(rows))
+    passed = True
+    for backend in backends:
+        try:
+            classifier = classifier_class(backend=backend)
+        except (FileNotFoundError, OSError) as e:
+            print(f'  {backend:<15}not checked ({e})')
+            continue
+        result = np.array(classifier.predict_batch(rows))
+        agreement = np.mean(result.argmax(axis=1) == reference.argmax(axis=1))
+        max_diff = np.abs(result - reference).max()
+        ok = agreement == 1.0 and max_diff <= atol
+        passed &= ok
+        print(f'  {backend:<15}class agreement {agreement:.4f}, max prob diff {max_diff:.2e}'
+              f'  {"ok" if ok else "FAILED"}')
+    return passed
+
+
+def main():
+    args = get_args()
+
+    rows = {name: [] for name in CLASSIFIERS}
+    sources = {name: [] for name in CLASSIFIERS}
+    for name, (_, dataset, width) in CLASSIFIERS.items():
+        if os.path.exists(dataset):
+            features, _ = load_dataset(dataset)
+            rows[name].extend(features[:, :width])
+            sources[name].append(dataset)
+    for path in args.landmark_cache:
+        for name, recorded in recorded_rows(path).items():
+            if len(recorded) > 0:
+                rows[name].extend(recorded)
+                sources[name].append(path)
+
+    backends = available_backends()
+    failed = False
+    for name, (classifier_class, _, _) in CLASSIFIERS.items():
+        if len(rows[name]) == 0:
+            print(f'{name}: no recorded rows, not checked')
+            failed |= args.require_all
+            continue
+        batch = np.array(rows[name], dtype=np.float32)
+        print(f'{name}: {len(batch)} recorded rows from {", ".join(sources[name])}')
+        failed |= not check(classifier_class, batch, backends, args.atol)
+
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
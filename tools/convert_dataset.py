@@ -0,0 +1,50 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Convert training data (CSV and/or .npz chunks) into one binary .npz.
+
+    python -m tools.convert_dataset \
+        --input model/point_history_classifier/point_history.csv \
+        --output model/point_history_classifier/point_history.npz
+
+The result holds float32 'features' and int32 'labels' and loads in
+milliseconds with np.load() or utils.load_dataset(), instead of parsing
+the CSV with np.loadtxt().
+"""
+import argparse
+import time
+
+import numpy as np
+
+from utils import load_dataset
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--input', help='CSV files, chunk directories or .npz',
+                        type=str, nargs='+', required=True)
+    parser.add_argument('--output', type=str, required=True)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    start = time.perf_counter()
+    datasets = [load_dataset(path) for path in args.input]
+    features = np.concatenate([features for features, _ in datasets])
+    labels = np.concatenate([labels for _, labels in datasets])
+    text_time = time.perf_counter() - start
+
+    np.savez(args.output, features=features, labels=labels)
+
+    start = time.perf_counter()
+    load_dataset(args.output)
+    binary_time = time.perf_counter() - start
+
+    print(f'{len(labels)} rows x {features.shape[1]} features -> {args.output}')
+    print(f'Load time: inputs {text_time * 1000:.1f} ms, '
+          f'{args.output} {binary_time * 1000:.1f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,36 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Convert the classifier .tflite models to .onnx for the onnx backend.
+
+    python -m tools.convert_onnx
+
+Requires tf2onnx (conversion only; the onnx backend needs onnxruntime).
+"""
+import argparse
+
+import tf2onnx
+
+MODEL_PATHS = [
+    'model/keypoint_classifier/keypoint_classifier.tflite',
+    'model/point_history_classifier/point_history_classifier.tflite',
+]
+
+
+def convert(tflite_path, opset=13):
+    onnx_path = tflite_path.rsplit('.', 1)[0] + '.onnx'
+    tf2onnx.convert.from_tflite(tflite_path, opset=opset, output_path=onnx_path)
+    return onnx_path
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("model_paths", nargs="*", default=MODEL_PATHS)
+    parser.add_argument("--opset", type=int, default=13)
+    args = parser.parse_args()
+
+    for tflite_path in args.model_paths:
+        print(tflite_path, '->', convert(tflite_path, opset=args.opset))
+
+
+if __name__ == "__main__":
+    main()
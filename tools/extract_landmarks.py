@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Run MediaPipe Hands once over a video and save the landmarks.
+
+--output is a landmark cache directory (memory-mapped .npy arrays), or a
+compressed landmark stream when it ends with .npz. The frames are
+mirrored like in app.py, so the result can be replayed with
+
+    python -m tools.extract_landmarks --video session.mp4 --output session_cache
+    python app.py --landmark_cache session_cache --replay_speed max
+    python app.py --device session_cache --replay_speed max
+"""
+import argparse
+
+import cv2 as cv
+import numpy as np
+
+from utils import save_landmark_cache
+from utils import save_landmark_stream
+from utils.landmarks import landmarks_to_array
+from utils.replay import HANDEDNESS_LABELS
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--video', type=str, required=True)
+    parser.add_argument('--output', type=str, required=True)
+    parser.add_argument('--max_num_hands', type=int, default=1)
+    parser.add_argument('--min_detection_confidence', type=float, default=0.7)
+    parser.add_argument('--min_tracking_confidence', type=float, default=0.5)
+    return parser.parse_args()
+
+
+def main():
+    args = get_args()
+
+    import mediapipe as mp
+
+    hands = mp.solutions.hands.Hands(
+        static_image_mode=False,
+        max_num_hands=args.max_num_hands,
+        min_detection_confidence=args.min_detection_confidence,
+        min_tracking_confidence=args.min_tracking_confidence,
+    )
+
+    cap = cv.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise FileNotFoundError(f'Cannot open video {args.video}')
+    fps = cap.get(cv.CAP_PROP_FPS) or 30.0
+
+    landmarks, hand_count, handedness, scores, timestamps = [], [], [], [], []
+    image_size = None
+    while True:
+        ret, image = cap.read()
+        if not ret:
+            break
+        image = cv.flip(image, 1)
+        image_size = (image.shape[1], image.shape[0])
+
+        image = cv.cvtColor(image, cv.COLOR_BGR2RGB)
+        image.flags.writeable = False
+        results = hands.process(image)
+
+        frame_landmarks = np.zeros((args.max_num_hands, 21, 2), dtype=np.float32)
+        frame_handedness = np.zeros(args.max_num_hands, dtype=np.int8)
+        frame_scores = np.zeros(args.max_num_hands, dtype=np.float32)
+        count = 0
+        if results.multi_hand_landmarks is not None:
+            for hand_landmarks, hand_handedness in zip(
+                    results.multi_hand_landmarks, results.multi_handedness):
+                frame_landmarks[count] = landmarks_to_array(hand_landmarks)
+                classification = hand_handedness.classification[0]
+                frame_handedness[count] = HANDEDNESS_LABELS.index(
+                    classification.label)
+                frame_scores[count] = classification.score
+                count += 1
+
+        landmarks.append(frame_landmarks)
+        hand_count.append(count)
+        handedness.append(frame_handedness)
+        scores.append(frame_scores)
+        timestamps.append(len(timestamps) / fps)
+
+    cap.release()
+    hands.close()
+
+    if image_size is None:
+        raise ValueError(f'No frames read from {args.video}')
+
+    if args.output.endswith('.npz'):
+        save_landmark_stream(args.output, landmarks, hand_count, handedness,
+                             timestamps, image_size)
+    else:
+        save_landmark_cache(args.output, landmarks, hand_count, handedness,
+                            scores, timestamps, image_size)
+    print(f'{len(timestamps)} frames, {sum(hand_count)} hands -> {args.output}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,180 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Quantized float16 / int8 variants of the classifiers, with a report.
+
+Converts the shipped .tflite models (their weights, rebuilt as Keras
+models) to <name>_float16.tflite (float16 weights) and <name>_int8.tflite
+(full integer quantization with float input and output; the training rows
+of the CSV dataset are the representative data), then compares them with
+the shipped .tflite on the test rows of the notebooks' split (see
+tools/train.py): accuracy, agreement with the shipped model, file size,
+per-invoke latency and the memory a call allocates.
+
+    python -m tools.quantize
+    python -m tools.quantize --model point_history --report quantization.json
+
+Run the app with a variant: python app.py --quantization float16 (a
+classifier without the variant, such as the keypoint classifier without
+its int8 model, falls back to the shipped model with a warning)
+Without the dataset CSV there is nothing to calibrate with, so int8 is
+skipped; float16 is still written and random rows stand in for the data,
+so only its agreement with the shipped model is meaningful.
+"""
+import argparse
+import json
+import os
+import time
+import tracemalloc
+
+import numpy as np
+
+from model.backends import TFLiteBackend
+from model.backends import load_dense_layers
+from model.backends import quantized_model_path
+from tools.train import MODELS
+from tools.train import train_test_split
+from utils import load_dataset_cached
+
+VARIANTS = ('float16', 'int8')
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', choices=[*MODELS, 'all'], default='all')
+    parser.add_argument('--variants', choices=VARIANTS, nargs='+', default=list(VARIANTS))
+    parser.add_argument('--calibration_rows', help='Representative rows for int8',
+                        type=int, default=1000)
+    parser.add_argument('--train_size', type=float, default=0.75)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', help='Latency iterations', type=int, default=2000)
+    parser.add_argument('--report', help='Also write the report to this JSON file',
+                        type=str, default=None)
+    return parser.parse_args()
+
+
+def load_rows(config, args):
+    # (train features or None, test features, test labels or None)
+    if os.path.exists(config['dataset']):
+        features, labels = load_dataset_cached(config['dataset'])
+        features = features[:, :config['input_width']]
+        X_train, X_test, _, y_test = train_test_split(
+            features, labels, args.train_size, args.seed)
+        return X_train, X_test, y_test
+
+    # Features are max-abs normalized, so [-1, 1] covers the input range
+    print(f'{config["name"]}: {config["dataset"]} not found, using random rows')
+    rng = np.random.default_rng(args.seed)
+    X = rng.uniform(-1, 1, (1000, config['input_width'])).astype(np.float32)
+    return None, X, None
+
+
+def shipped_model(tf, tflite_path):
+    # Keras copy of the float32 layers of the shipped .tflite, so the
+    # variants quantize the model the app actually runs
+    layers = load_dense_layers(tflite_path)
+    model = tf.keras.models.Sequential([tf.keras.layers.Input((layers[0][0].shape[0], ))])
+    for kernel, bias, activation in layers:
+        dense = tf.keras.layers.Dense(kernel.shape[1], activation=activation)
+        model.add(dense)
+        dense.set_weights([kernel, bias])
+    return model
+
+
+def convert(tf, model, variant, calibration):
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if variant == 'float16':
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        # Integer-only kernels; the input and output stay float32, so the
+        # classifiers feed the same rows as to the float models
+        converter.representative_dataset = lambda: ([row[None]] for row in calibration)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+    return converter.convert()
+
+
+def measure(tflite_path, X_test, y_test, reference, iterations):
+    backend = TFLiteBackend(tflite_path)
+    predictions = np.array(backend.invoke(X_test)).argmax(axis=1)
+
+    row = X_test[0]
+    for _ in range(100):
+        backend.invoke_one(row)
+    elapsed = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        backend.invoke_one(row)
+        elapsed[i] = time.perf_counter() - start
+    elapsed *= 1e6
+
+    # Transient peak of one call above the baseline, as in
+    # benchmarks/classifier_benchmark.py
+    tracemalloc.start()
+    backend.invoke_one(row)
+    baseline, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    for _ in range(100):
+        backend.invoke_one(row)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'path': tflite_path,
+        'size_bytes': os.path.getsize(tflite_path),
+        'accuracy': None if y_test is None else float(np.mean(predictions == y_test)),
+        'agreement': 1.0 if reference is None else float(np.mean(predictions == reference)),
+        'p50_us': float(np.percentile(elapsed, 50)),
+        'p99_us': float(np.percentile(elapsed, 99)),
+        'peak_bytes': int(peak - baseline),
+    }, predictions
+
+
+def quantize(tf, config, args):
+    base_path = os.path.join(config['model_dir'], config['name'])
+    tflite_path = base_path + '.tflite'
+    X_train, X_test, y_test = load_rows(config, args)
+    calibration = None if X_train is None else X_train[:args.calibration_rows]
+    model = shipped_model(tf, tflite_path)
+
+    # The shipped model is the reference of the agreement
+    report = {}
+    report['shipped'], reference = measure(tflite_path, X_test, y_test, None, args.iterations)
+    for variant in args.variants:
+        if variant == 'int8' and calibration is None:
+            print(f'{config["name"]}: no calibration rows, int8 skipped')
+            continue
+        variant_path = quantized_model_path(tflite_path, variant)
+        with open(variant_path, 'wb') as f:
+            f.write(convert(tf, model, variant, calibration))
+        report[variant], _ = measure(variant_path, X_test, y_test, reference, args.iterations)
+
+    if y_test is None:
+        print(f'{config["name"]}: {len(X_test)} random rows')
+    else:
+        print(f'{config["name"]}: {len(X_test)} test rows, '
+              f'{len(calibration)} calibration rows')
+    print(f"  {'model':<9}{'size KB':>9}{'accuracy':>10}{'agreement':>11}"
+          f"{'p50 us':>9}{'p99 us':>9}{'peak B':>8}  path")
+    for variant, result in report.items():
+        accuracy = '-' if result['accuracy'] is None else f'{result["accuracy"]:.4f}'
+        print(f'  {variant:<9}{result["size_bytes"] / 1024:>9.1f}{accuracy:>10}'
+              f'{result["agreement"]:>11.4f}{result["p50_us"]:>9.1f}'
+              f'{result["p99_us"]:>9.1f}{result["peak_bytes"]:>8d}  {result["path"]}')
+    return report
+
+
+def main():
+    args = get_args()
+
+    import tensorflow as tf
+
+    names = list(MODELS) if args.model == 'all' else [args.model]
+    report = {name: quantize(tf, MODELS[name], args) for name in names}
+
+    if args.report is not None:
+        with open(args.report, 'w') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
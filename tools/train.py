@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+"""Train the classifiers and export .hdf5 / .tflite, CPU only.
+
+Same models, split and TFLite conversion as keypoint_classification.ipynb
+and point_history_classification.ipynb. The CSVs are parsed once into a
+binary cache (utils.load_dataset_cached). The models are written to
+trained/ unless --overwrite replaces the shipped ones in model/.
+
+    python -m tools.train --model all
+    python -m tools.train --model point_history --epochs 50 --output_dir /tmp/models
+    python -m tools.train --model keypoint --overwrite
+"""
+import argparse
+import os
+import time
+
+# CPU only, also on machines with a GPU
+os.environ.setdefault('CUDA_VISIBLE_DEVICES', '-1')
+
+import numpy as np
+
+from model.backends import TFLiteBackend
+from utils import load_dataset_cached
+
+MODELS = {
+    'keypoint': {
+        'dataset': 'model/keypoint_classifier/keypoint.csv',
+        'model_dir': 'model/keypoint_classifier',
+        'name': 'keypoint_classifier',
+        'input_width': 21 * 2,
+        'num_classes': 6,
+        'layers': [(0.2, 20), (0.4, 10)],
+    },
+    'point_history': {
+        'dataset': 'model/point_history_classifier/point_history.csv',
+        'model_dir': 'model/point_history_classifier',
+        'name': 'point_history_classifier',
+        'input_width': 16 * 2,
+        'num_classes': 4,
+        'layers': [(0.2, 24), (0.5, 10)],
+    },
+}
+
+
+def get_args():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--model', choices=[*MODELS, 'all'], default='all')
+    parser.add_argument('--dataset', help='CSV for a single --model',
+                        type=str, default=None)
+    parser.add_argument('--output_dir', type=str, default='trained')
+    parser.add_argument('--overwrite', help='Replace the shipped models in model/',
+                        action='store_true')
+    parser.add_argument('--num_classes', type=int, default=None)
+    parser.add_argument('--epochs', type=int, default=1000)
+    parser.add_argument('--batch_size', type=int, default=128)
+    parser.add_argument('--patience', type=int, default=20)
+    parser.add_argument('--train_size', type=float, default=0.75)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--iterations', help='TFLite latency iterations',
+                        type=int, default=1000)
+    return parser.parse_args()
+
+
+def train_test_split(features, labels, train_size, seed):
+    # The rows of sklearn's train_test_split(train_size=train_size,
+    # random_state=seed) used by the notebooks, without sklearn: one
+    # RandomState permutation, test rows first
+    order = np.random.RandomState(seed).permutation(len(labels))
+    n_train = int(np.floor(len(labels) * train_size))
+    n_test = len(labels) - n_train
+    train, test = order[n_test:], order[:n_test]
+    return features[train], features[test], labels[train], labels[test]
+
+
+def build_model(tf, input_width, num_classes, layers):
+    model = tf.keras.models.Sequential([tf.keras.layers.Input((input_width, ))])
+    for dropout, units in layers:
+        model.add(tf.keras.layers.Dropout(dropout))
+        model.add(tf.keras.layers.Dense(units, activation='relu'))
+    model.add(tf.keras.layers.Dense(num_classes, activation='softmax'))
+    model.compile(
+        optimizer='adam',
+        loss='sparse_categorical_crossentropy',
+        metrics=['accuracy'],
+    )
+    return model
+
+
+def export_tflite(tf, model, tflite_path):
+    # As in the notebooks. The weight matrices are below the converter's
+    # 1024-element minimum for dynamic range quantization, so they stay float32
+    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    with open(tflite_path, 'wb') as f:
+        f.write(converter.convert())
+
+
+def measure_tflite(tflite_path, features, labels, iterations):
+    backend = TFLiteBackend(tflite_path)
+    accuracy = float(np.mean(backend.invoke(features).argmax(axis=1) == labels))
+
+    row = features[0]
+    for _ in range(100):
+        backend.invoke_one(row)
+    elapsed = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        backend.invoke_one(row).argmax()
+        elapsed[i] = time.perf_counter() - start
+    elapsed *= 1e6
+    return accuracy, np.percentile(elapsed, 50), np.percentile(elapsed, 99)
+
+
+def train(tf, config, args):
+    dataset = args.dataset or config['dataset']
+    output_dir = config['model_dir'] if args.overwrite else args.output_dir
+    if (not args.overwrite
+            and os.path.abspath(output_dir) == os.path.abspath(config['model_dir'])):
+        raise SystemExit(f'{output_dir} holds the shipped models, pass --overwrite')
+    os.makedirs(output_dir, exist_ok=True)
+    hdf5_path = os.path.join(output_dir, config['name'] + '.hdf5')
+    tflite_path = os.path.join(output_dir, config['name'] + '.tflite')
+
+    start = time.perf_counter()
+    features, labels = load_dataset_cached(dataset)
+    load_time = time.perf_counter() - start
+    features = features[:, :config['input_width']]
+    num_classes = args.num_classes or max(config['num_classes'],
+                                          int(labels.max()) + 1)
+
+    X_train, X_test, y_train, y_test = train_test_split(
+        features, labels, args.train_size, args.seed)
+
+    tf.keras.utils.set_random_seed(args.seed)
+    model = build_model(tf, config['input_width'], num_classes,
+                        config['layers'])
+    es_callback = tf.keras.callbacks.EarlyStopping(
+        patience=args.patience, restore_best_weights=True)
+
+    start = time.perf_counter()
+    history = model.fit(
+        X_train,
+        y_train,
+        epochs=args.epochs,
+        batch_size=args.batch_size,
+        validation_data=(X_test, y_test),
+        callbacks=[es_callback],
+        verbose=0,
+    )
+    train_time = time.perf_counter() - start
+    _, val_acc = model.evaluate(X_test, y_test, batch_size=args.batch_size,
+                                verbose=0)
+
+    # Model dedicated to inference
+    model.save(hdf5_path, include_optimizer=False)
+    export_tflite(tf, model, tflite_path)
+
+    tflite_acc, p50, p99 = measure_tflite(tflite_path, X_test, y_test,
+                                          args.iterations)
+
+    print(f'{config["name"]}: {len(labels)} rows '
+          f'(loaded in {load_time * 1000:.1f} ms), {num_classes} classes')
+    print(f'  training: {len(history.epoch)} epochs in {train_time:.1f} s, '
+          f'val accuracy {val_acc:.4f}')
+    print(f'  {tflite_path}: accuracy {tflite_acc:.4f}, '
+          f'latency p50 {p50:.1f} us, p99 {p99:.1f} us')
+    print(f'  {hdf5_path}')
+
+
+def main():
+    args = get_args()
+
+    names = list(MODELS) if args.model == 'all' else [args.model]
+    if args.dataset is not None and len(names) > 1:
+        raise SystemExit('--dataset needs a single --model')
+
+    import tensorflow as tf
+
+    for name in names:
+        config = MODELS[name]
+        if args.dataset is None and not os.path.exists(config['dataset']):
+            print(f'{config["name"]}: {config["dataset"]} not found, skipped')
+            continue
+        train(tf, config, args)
+
+
+if __name__ == '__main__':
+    main()
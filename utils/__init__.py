@@ -1,2 +1,39 @@
 from utils.cvfpscalc import CvFpsCalc
 from utils.artnet_handler import ArtnetHandler
+from utils.artnet_handler import load_channel_map
+from utils.artnet_handler import default_channel_map
+from utils.artnet_handler import pointer_to_dmx
+from utils.pipeline import RingBuffer
+from utils.pipeline import ZipBuffer
+from utils.pipeline import StageTimer
+from utils.pipeline import CaptureThread
+from utils.pipeline import StageThread
+from utils.pipeline import AsyncOutputThread
+from utils.shutdown import install_shutdown_handler
+from utils.landmarks import landmarks_to_array
+from utils.landmarks import calc_landmark_points
+from utils.landmarks import calc_bounding_rect
+from utils.landmarks import pre_process_landmark
+from utils.landmarks import pre_process_point_history
+from utils.history import PointHistory
+from utils.history import ModeVote
+from utils.gestures import GestureDebouncer
+from utils.tracking import HandSlots
+from utils.replay import VideoReplay
+from utils.replay import LandmarkReplay
+from utils.replay import save_landmark_stream
+from utils.replay import save_landmark_cache
+from utils.dataset import DatasetWriter
+from utils.dataset import load_dataset
+from utils.dataset import load_dataset_cached
+from utils.detection import DetectionScheduler
+from utils.preprocess import FramePreprocessor
+from utils.preprocess import mirror_results
+from utils.metrics import Metrics
+from utils.metrics import MetricsServer
+from utils.metrics import MetricsDumper
+from utils.events import EventLog
+from utils.workers import CameraWorker
+from utils.startup import StartupTimer
+from utils.smoothing import OneEuroFilter
+from utils.smoothing import KalmanFilter
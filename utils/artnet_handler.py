@@ -1,52 +1,299 @@
 from pyartnet import ArtNetNode
+from pyartnet.errors import UniverseNotFoundError
 import asyncio
+import json
+import time
+
+import numpy as np
+
+from utils.gestures import GestureDebouncer
+
+# Values that can be mapped to DMX channels, in the order of pending_data;
+# x_fine / y_fine are the low bytes of 16-bit x / y
+FIELDS = ("class", "x", "y", "x_fine", "y_fine")
+
+
+def load_channel_map(path):
+    """Read a channel map from a JSON file.
+
+    {"outputs": [{"node": "10.255.255.2", "port": 6454, "universe": [0, 1],
+                  "start": 1, "fields": ["class", "x", "y"]}, ...]}
+
+    "port" defaults to 6454, "universe" may be a single number or a list.
+    Returns the list of outputs with one universe each.
+    """
+    with open(path, encoding="utf-8") as f:
+        config = json.load(f)
+
+    channel_map = []
+    for output in config["outputs"]:
+        fields = list(output["fields"])
+        for field in fields:
+            if field not in FIELDS:
+                raise ValueError(f"Unknown field '{field}' in {path}, expected one of {FIELDS}")
+
+        universes = output.get("universe", 0)
+        if isinstance(universes, int):
+            universes = [universes]
+        for universe in universes:
+            channel_map.append({
+                "node": output["node"],
+                "port": output.get("port", 6454),
+                "universe": universe,
+                "start": output.get("start", 1),
+                "fields": fields,
+            })
+    return channel_map
+
+
+def default_channel_map(ip_address, port=6454, fine=False):
+    # The original layout: class, x, y on channels 1-3 of universe 0; with
+    # fine, 16-bit x and y as coarse/fine pairs on channels 2-5
+    fields = ["class", "x", "x_fine", "y", "y_fine"] if fine else ["class", "x", "y"]
+    return [{"node": ip_address, "port": port, "universe": 0, "start": 1, "fields": fields}]
+
+
+def pointer_to_dmx(points, width, height, offset=25):
+    """16-bit DMX values of (N, 2) or (2, ) pointer coordinates in pixels.
+
+    The high byte is the original 8-bit mapping, int(x / width * 255)
+    + offset clamped to 0-255; the low byte adds the fraction that was
+    cut off. Returns an int array of the same shape.
+    """
+    scale = np.array((255 * 256 / width, 255 * 256 / height))
+    values = np.floor(np.asarray(points) * scale) + offset * 256
+    return np.clip(values, 0, 65535).astype(np.int64)
+
 
 class ArtnetHandler:
-    def __init__(self, ip_address, port=6454):
-        self.node = ArtNetNode(ip_address, port)
-        self.universe = self.node.add_universe(0)
-        self.channels = self.universe.add_channel(start=1, width=3, channel_name="class")
-        
+    def __init__(self, ip_address=None, port=6454, refresh_rate=40, keep_alive=1.0, channel_map=None,
+                 on_send=None, metrics=None, events=None, pointer_filter=None, prediction_lead=0.0,
+                 gestures=None):
+        if channel_map is None:
+            channel_map = default_channel_map(ip_address, port)
+
+        # One ArtNetNode per (ip, port); packets are sent by our own refresh
+        # task, not pyartnet's
+        self.nodes = {}
+        self.universes = {}  # (ip, port) -> universes of that node
+        self.outputs = []  # (channel, field indices into pending_data)
+        for output in channel_map:
+            key = (output["node"], output["port"])
+            if key not in self.nodes:
+                self.nodes[key] = ArtNetNode(output["node"], output["port"], start_refresh_task=False)
+                self.universes[key] = []
+            node = self.nodes[key]
+
+            try:
+                universe = node.get_universe(output["universe"])
+            except UniverseNotFoundError:
+                universe = node.add_universe(output["universe"])
+                self.universes[key].append(universe)
+            channel = universe.add_channel(
+                start=output["start"],
+                width=len(output["fields"]),
+                channel_name=f"gesture{output['start']}",
+            )
+            self.outputs.append((channel, [FIELDS.index(field) for field in output["fields"]]))
+
+        self.refresh_rate = refresh_rate
+        self.keep_alive = keep_alive  # Resend unchanged data after this many seconds
+
         self.last_sent_data = None
-        self.previous_indices = [None, None, None]  # Store the previous 3 indices
+        self.last_sent_time = 0.0
+        self.last_sent_capture_time = None
+        self.pending_data = [0] * len(FIELDS)
+        self.pending_capture_time = None
+        # utils.OneEuroFilter / KalmanFilter for the pointers (hand sign 2),
+        # one row per pointing hand keyed by its hand key, timestamped with
+        # the capture time. Each refresh tick sends the followed pointer
+        # extrapolated to the send time plus prediction_lead seconds
+        self.pointer_filter = pointer_filter
+        self.prediction_lead = prediction_lead
+        self._pointers = None  # Filtered pointers of the last frame
+        self._pointer_size = None  # (width, height) of the active pointer
+        self._pointer_key = None
+        # Key of the hand the output follows, see set_hands()
+        self.followed = None
+        # Called as on_send(capture_time, send_time) after new values were sent
+        self.on_send = on_send
+        # utils.Metrics; times every refresh tick as "artnet_send"
+        self.metrics = metrics
+        # utils.EventLog for send errors; printed without one
+        self.events = events
+        # Debounces the classes given to is_valid_data
+        self.gestures = gestures or GestureDebouncer()
+
+        # Counters (one packet per universe)
+        self.packets_sent = 0
+        self.packets_suppressed = 0
+        self.send_errors = 0
+        self._error_streak = 0
 
-    async def send_data(self, index, landmark, weight, height):
+        self._task = None
+
+    def set_hands(self, hands, weight, height, capture_time=None):
+        """Send one of several hands.
+
+        hands is a list of (key, index, landmark) of the hands with an
+        accepted hand sign, most preferred first; key identifies a hand
+        across frames and keys the pointer filter rows, so it must follow
+        the hand rather than its list position (app.py passes the
+        GestureRecognizer slot, see utils.HandSlots). All channels follow one hand: the one followed so
+        far while it is in the list, otherwise the first one. Every
+        pointing hand is filtered, so switching to another pointer
+        continues from its own history. Without hands the pending values
+        are kept.
+        """
+        keys = [key for key, _, _ in hands]
+        if len(keys) == 0:
+            return None
+        if self.followed not in keys:
+            self.followed = keys[0]
+        self._filter_pointers([(key, landmark) for key, index, landmark in hands if index == 2],
+                              capture_time)
+        key, index, landmark = hands[keys.index(self.followed)]
+        return self._set_pending(index, landmark, weight, height, capture_time, key)
+
+    def set_data(self, index, landmark, weight, height, capture_time=None):
+        # Only stores the values; the refresh task sends them on its next tick
+        self._filter_pointers([(None, landmark)] if index == 2 else [], capture_time)
+        return self._set_pending(index, landmark, weight, height, capture_time, None)
+
+    def _filter_pointers(self, pointers, capture_time):
+        # All pointing hands of a frame in one (N, 2) update; rows of hands
+        # that stopped pointing are dropped
+        if self.pointer_filter is None:
+            return
+        timestamp = capture_time if capture_time is not None else time.perf_counter()
+        fingertips = np.array([landmark[8][:2] for _, landmark in pointers], dtype=np.float64)
+        self._pointers = self.pointer_filter.update(
+            fingertips.reshape(-1, 2), timestamp, keys=[key for key, _ in pointers])
+
+    def _set_pending(self, index, landmark, weight, height, capture_time, key):
+        self.pending_capture_time = capture_time
         if index == 2:
-            landmark_x = landmark[8][0]
-            landmark_y = landmark[8][1]
-            print(f"l_X: {landmark_x}")
-            print(f"l_Y: {landmark_y}")
-            
-            x_norm = int(((landmark_x)/weight) * 255)+25
-            y_norm = int((landmark_y/height) * 255)+25
-            print(f"X: {x_norm}")
-            print(f"Y: {y_norm}")
-            
-            self.channels.add_fade([index, x_norm, y_norm], 0)
-            await self.channels
-            return x_norm, y_norm
+            if self.pointer_filter is None:
+                pointer = landmark[8][:2]
+            else:
+                pointer = self._pointers[self.pointer_filter.keys.index(key)]
+            self._pointer_size = (weight, height)
+            self._pointer_key = key
 
+            self.pending_data = self._pointer_data(pointer)
+            return self.pending_data[1], self.pending_data[2]
 
         else:
-            self.channels.add_fade([index, 0, 0], 0)
-            await self.channels
-        
-    def is_valid_data(self, index):
-        # Check if the last two indices match the current index and are different from the one before
-        if index == 2 or (self.previous_indices[-1] == index and self.previous_indices[-2] != index):
-        #if self.previous_indices[-1] != index:
-            valid = True
-        else:
-            valid = False
+            self._pointer_size = None
+            self._pointer_key = None
+            if landmark is None:
+                self.followed = None  # No hand
+            self.pending_data = [index, 0, 0, 0, 0]
+
+    def _pointer_data(self, pointer):
+        x, y = pointer_to_dmx(pointer, *self._pointer_size).tolist()
+        return [2, x >> 8, y >> 8, x & 0xFF, y & 0xFF]
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
 
-        # Update the list of previous indices
-        self.previous_indices.pop(0)
-        self.previous_indices.append(index)
+    async def _refresh(self):
+        loop = asyncio.get_running_loop()
+        interval = 1.0 / self.refresh_rate
+        next_tick = loop.time()
+        while True:
+            if self.metrics is None:
+                self.send_pending()
+            else:
+                with self.metrics.measure("artnet_send"):
+                    self.send_pending()
 
-        return valid
+            # Fixed rate; skip ticks instead of bursting after a stall
+            next_tick += interval
+            now = loop.time()
+            if next_tick < now:
+                next_tick = now
+            await asyncio.sleep(next_tick - now)
+
+    def send_pending(self):
+        if self._pointer_size is not None and self.pointer_filter is not None:
+            # Latency compensation: the pointer where it should be now
+            pointers = self.pointer_filter.predict(time.perf_counter() + self.prediction_lead)
+            row = self.pointer_filter.keys.index(self._pointer_key)
+            self.pending_data = self._pointer_data(pointers[row])
+        data = self.pending_data
+        now = time.monotonic()
+        if data == self.last_sent_data and now - self.last_sent_time < self.keep_alive:
+            self.packets_suppressed += 1
+            return False
+
+        # Update every mapped channel first, then send each node's universes
+        # in one pass
+        changed = data != self.last_sent_data
+        if changed:
+            for channel, fields in self.outputs:
+                channel.set_values([data[field] for field in fields])
+
+        failed = False
+        for (ip_address, port), universes in self.universes.items():
+            try:
+                for universe in universes:
+                    universe.send_data()
+                    self.packets_sent += 1
+            except OSError as e:
+                # Report only the first error of a series
+                if self._error_streak == 0:
+                    self._report_error(ip_address, port, e)
+                self.send_errors += 1
+                failed = True
+
+        if failed:
+            self._error_streak += 1
+            return False
+
+        if self._error_streak > 0 and self.events is not None:
+            self.events.info("artnet_recovered", failed_ticks=self._error_streak)
+        self._error_streak = 0
+        self.last_sent_data = data
+        self.last_sent_time = now
+        # Once per frame: predicted pointer values change on every tick
+        capture_time = self.pending_capture_time
+        if changed and capture_time is not None and capture_time != self.last_sent_capture_time:
+            self.last_sent_capture_time = capture_time
+            if self.on_send is not None:
+                self.on_send(capture_time, time.perf_counter())
+        return True
+
+    def _report_error(self, ip_address, port, e):
+        if self.events is not None:
+            self.events.error("artnet_error", node=f"{ip_address}:{port}", errno=e.errno, message=str(e))
+        elif e.errno == 101:  # Network is unreachable
+            print(f"Network error: {ip_address}:{port} is unreachable.")
+        else:
+            print(f"Network error occurred: {e}")
+
+    def is_valid_data(self, index):
+        # For callers with only the argmax class: True while index is the
+        # accepted hand sign. app.py debounces the classifier probabilities
+        # in GestureRecognizer instead
+        return self.gestures.update_class(index) == index
 
 
 # Example usage:
-# sender = ArtNetSender("192.168.1.2")  # Replace with your Art-Net node IP
-# if sender.is_valid_data(classification_index):
-#     sender.send_data(classification_index)
+# handler = ArtnetHandler("192.168.1.2")  # Replace with your Art-Net node IP
+# handler = ArtnetHandler(channel_map=load_channel_map("artnet_map.example.json"))
+# handler = ArtnetHandler("192.168.1.2", channel_map=default_channel_map("192.168.1.2", fine=True),
+#                         pointer_filter=OneEuroFilter())  # Smoothed 16-bit x/y
+# handler.start()  # inside a running event loop
+# if handler.is_valid_data(classification_index):
+#     handler.set_data(classification_index, landmark_list, 720, 550)
@@ -0,0 +1,136 @@
+import csv
+import glob
+import hashlib
+import os
+import threading
+
+import numpy as np
+
+
+class DatasetWriter(threading.Thread):
+    """Appends labelled feature rows to a training CSV from a worker thread.
+
+    write() only buffers the row in memory; the worker appends the buffered
+    rows every flush_interval seconds, or as soon as flush_size rows are
+    waiting. With chunk_dir set, every flush also saves the batch as an
+    .npz chunk (labels, features) that load_dataset() reads without
+    parsing text; rows that are not width features long (a point history
+    that is not full yet) only go to the CSV.
+    """
+
+    def __init__(self, csv_path, chunk_dir=None, width=None, flush_size=256, flush_interval=1.0,
+                 name="dataset_writer"):
+        super().__init__(name=name, daemon=True)
+        self.csv_path = csv_path
+        self.chunk_dir = chunk_dir
+        self.width = width
+        self._flush_size = flush_size
+        self._flush_interval = flush_interval
+
+        self._rows = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop_event = threading.Event()
+
+        self.rows_written = 0
+        self._chunk_index = 0
+        if chunk_dir is not None:
+            # Continue the numbering of an earlier session
+            self._chunk_index = len(glob.glob(os.path.join(chunk_dir, "chunk_*.npz")))
+
+    def write(self, label, features):
+        row = (label, np.array(features, dtype=np.float32))
+        with self._lock:
+            self._rows.append(row)
+            pending = len(self._rows)
+        if pending >= self._flush_size:
+            self._wake.set()
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self._wake.wait(self._flush_interval)
+            self._wake.clear()
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            rows, self._rows = self._rows, []
+        if len(rows) == 0:
+            return
+
+        with open(self.csv_path, "a", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerows([label, *features.tolist()] for label, features in rows)
+
+        chunk_rows = [row for row in rows if self.width is None or len(row[1]) == self.width]
+        if self.chunk_dir is not None and len(chunk_rows) > 0:
+            os.makedirs(self.chunk_dir, exist_ok=True)
+            chunk_path = os.path.join(self.chunk_dir, f"chunk_{self._chunk_index:06d}.npz")
+            np.savez(
+                chunk_path,
+                labels=np.array([label for label, _ in chunk_rows], dtype=np.int32),
+                features=np.stack([features for _, features in chunk_rows]),
+            )
+            self._chunk_index += 1
+
+        self.rows_written += len(rows)
+
+    def close(self):
+        # Writes the remaining rows and stops the worker
+        self._stop_event.set()
+        self._wake.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.flush()
+
+
+def load_dataset(path):
+    """Return (features, labels) of a training dataset.
+
+    path is a CSV (label, features...), a directory of DatasetWriter .npz
+    chunks, or an .npz written by tools/convert_dataset.py.
+    """
+    if os.path.isdir(path):
+        chunk_paths = sorted(glob.glob(os.path.join(path, "chunk_*.npz")))
+        if len(chunk_paths) == 0:
+            raise FileNotFoundError(f"No dataset chunks in {path}")
+        features, labels = [], []
+        for chunk_path in chunk_paths:
+            with np.load(chunk_path) as chunk:
+                features.append(chunk["features"])
+                labels.append(chunk["labels"])
+        return np.concatenate(features), np.concatenate(labels)
+
+    if path.endswith(".npz"):
+        with np.load(path) as data:
+            return data["features"], data["labels"]
+
+    data = np.loadtxt(path, delimiter=",", dtype=np.float32, ndmin=2)
+    return np.ascontiguousarray(data[:, 1:]), data[:, 0].astype(np.int32)
+
+
+def load_dataset_cached(csv_path, cache_path=None):
+    """load_dataset() of a CSV, cached as a binary .npz next to it.
+
+    The cache is keyed by the CSV content hash, so it is rebuilt after new
+    rows were logged and otherwise loads without parsing text.
+    """
+    if cache_path is None:
+        cache_path = os.path.splitext(csv_path)[0] + "_cache.npz"
+
+    with open(csv_path, "rb") as f:
+        csv_hash = hashlib.sha1(f.read()).hexdigest()
+
+    if os.path.exists(cache_path):
+        with np.load(cache_path) as data:
+            if str(data["csv_hash"]) == csv_hash:
+                return data["features"], data["labels"]
+
+    features, labels = load_dataset(csv_path)
+    try:
+        np.savez(cache_path, csv_hash=csv_hash, features=features, labels=labels)
+    except OSError:
+        pass  # Read-only dataset directory, parse the CSV every time
+    return features, labels
@@ -0,0 +1,134 @@
+import numpy as np
+
+from utils.landmarks import landmarks_to_array
+from utils.preprocess import FramePreprocessor
+from utils.replay import ReplayResults
+
+
+class DetectionScheduler(object):
+    """Runs MediaPipe Hands on the full frame only when needed.
+
+    Full-frame detection runs every detect_interval frames (0: only when
+    needed, which needs roi_hands) and whenever the hands were lost. On
+    the frames in between:
+
+    * with roi_hands, a second Hands instance processes a crop around the
+      last hands (margin added, downscaled to at most roi_size pixels) and
+      the landmarks are mapped back to the full frame;
+    * otherwise the landmarks are extrapolated along the motion per frame
+      between the last two detections, for at most max_extrapolated frames
+      in a row before the full frame is detected again.
+
+    detect() takes the BGR frame and returns results with (21, 2) landmark
+    arrays in normalized full-frame coordinates, like LandmarkReplay. The
+    full frame goes through preprocess (a FramePreprocessor by default).
+    """
+
+    def __init__(self, hands, roi_hands=None, detect_interval=4, roi_size=256, roi_margin=0.25,
+                 preprocess=None, max_extrapolated=3):
+        if detect_interval < 0:
+            raise ValueError(f"detect_interval must be 0 or more, got {detect_interval}")
+        if detect_interval == 0 and roi_hands is None:
+            # Extrapolated hands are never lost, so nothing would detect again
+            raise ValueError("detect_interval=0 needs roi_hands")
+        self.hands = hands
+        self.roi_hands = roi_hands
+        self.detect_interval = detect_interval
+        self.max_extrapolated = max_extrapolated
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.preprocess = preprocess or FramePreprocessor()
+        self._roi_preprocess = FramePreprocessor(inference_width=roi_size)
+
+        self._landmarks = None  # (hands, 21, 2) of the last frame
+        self._handedness = None
+        self._frame = 0
+        self._frames_since_detection = 0  # Since the last full-frame detection
+        # Last detected (not extrapolated) landmarks, their frame and the
+        # motion per frame since the detection before
+        self._detected = None
+        self._detected_frame = 0
+        self._velocity = None
+
+        # Frames per path
+        self.full_frames = 0
+        self.roi_frames = 0
+        self.extrapolated_frames = 0
+
+    def detect(self, image):
+        self._frame += 1
+        due = 0 < self.detect_interval <= self._frames_since_detection + 1
+        if self._landmarks is None or due:
+            return self._detect_full(image)
+
+        self._frames_since_detection += 1
+        if self.roi_hands is not None:
+            landmarks = self._detect_roi(image)
+            if landmarks is None:
+                # Lost in the crop, look at the whole frame again
+                return self._detect_full(image)
+            self.roi_frames += 1
+            return self._update(landmarks, self._handedness)
+
+        if self._frame - self._detected_frame > self.max_extrapolated:
+            return self._detect_full(image)
+        self.extrapolated_frames += 1
+        frames = self._frame - self._detected_frame
+        self._landmarks = np.clip(self._detected + self._velocity * frames, 0.0, 1.0)
+        return ReplayResults(list(self._landmarks), self._handedness)
+
+    def _detect_full(self, image):
+        self.full_frames += 1
+        self._frames_since_detection = 0
+
+        results = self.hands.process(self.preprocess(image))
+        if results.multi_hand_landmarks is None:
+            self._landmarks = None
+            self._detected = None
+            return ReplayResults(None, None)
+
+        landmarks = np.stack([landmarks_to_array(hand) for hand in results.multi_hand_landmarks])
+        return self._update(landmarks, list(results.multi_handedness))
+
+    def _detect_roi(self, image):
+        image_height, image_width = image.shape[:2]
+        size = np.array((image_width, image_height), dtype=np.float32)
+
+        # Square crop around all hands of the last frame
+        points = self._landmarks.reshape(-1, 2) * size
+        center = (points.min(axis=0) + points.max(axis=0)) / 2
+        side = (points.max(axis=0) - points.min(axis=0)).max() * (1 + 2 * self.roi_margin)
+        side = int(min(max(side, 32), image_width, image_height))
+        x0 = int(np.clip(center[0] - side / 2, 0, image_width - side))
+        y0 = int(np.clip(center[1] - side / 2, 0, image_height - side))
+        crop = image[y0:y0 + side, x0:x0 + side]
+
+        # Downscaled to at most roi_size
+        results = self.roi_hands.process(self._roi_preprocess(crop))
+        if results.multi_hand_landmarks is None or len(results.multi_hand_landmarks) != len(self._landmarks):
+            return None
+
+        # Crop coordinates -> normalized full-frame coordinates
+        landmarks = np.stack([landmarks_to_array(hand) for hand in results.multi_hand_landmarks])
+        landmarks *= side
+        landmarks += (x0, y0)
+        landmarks /= size
+        return landmarks
+
+    def _update(self, landmarks, handedness):
+        # Detected landmarks; the velocity only ever comes from two of them
+        if self._detected is not None and len(self._detected) == len(landmarks):
+            self._velocity = (landmarks - self._detected) / (self._frame - self._detected_frame)
+        else:
+            self._velocity = np.zeros_like(landmarks)
+        self._detected = landmarks
+        self._detected_frame = self._frame
+        self._landmarks = landmarks
+        self._handedness = handedness
+        return ReplayResults(list(landmarks), handedness)
+
+    def close(self):
+        self.hands.close()
+        if self.roi_hands is not None:
+            self.roi_hands.close()
+
@@ -0,0 +1,104 @@
+import json
+import sys
+import threading
+import time
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+
+
+class EventLog(threading.Thread):
+    """Structured, rate-limited event log written by a worker thread.
+
+    log() only filters and buffers the event; the worker writes the
+    buffered events as JSON lines ({"time", "level", "event", **fields})
+    every flush_interval seconds, so the frame loop never waits for the
+    terminal or the disk. Events below level are ignored, and each event
+    name is limited to rate events per second (bursts of up to burst).
+    Events over the limit or over max_pending are counted and reported
+    once per flush as a "suppressed" event.
+    """
+
+    def __init__(self, path=None, level="info", rate=10.0, burst=20, max_pending=10000,
+                 flush_interval=0.5, name="event_log"):
+        super().__init__(name=name, daemon=True)
+        self.path = path
+        self.level = LEVELS[level]
+        self.rate = rate
+        self.burst = burst
+        self._max_pending = max_pending
+        self._flush_interval = flush_interval
+
+        self._events = []
+        self._buckets = {}  # event -> [tokens, last refill time]
+        self._suppressed = {}  # event -> count since the last flush
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+
+        self.events_written = 0
+        self.events_suppressed = 0
+
+    def log(self, level, event, **fields):
+        if LEVELS[level] < self.level:
+            return
+        now = time.time()
+        with self._lock:
+            bucket = self._buckets.get(event)
+            if bucket is None:
+                bucket = self._buckets[event] = [self.burst, now]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] < 1 or len(self._events) >= self._max_pending:
+                self._suppressed[event] = self._suppressed.get(event, 0) + 1
+                return
+            bucket[0] -= 1
+            self._events.append((now, level, event, fields))
+
+    def debug(self, event, **fields):
+        self.log("debug", event, **fields)
+
+    def info(self, event, **fields):
+        self.log("info", event, **fields)
+
+    def warning(self, event, **fields):
+        self.log("warning", event, **fields)
+
+    def error(self, event, **fields):
+        self.log("error", event, **fields)
+
+    def run(self):
+        while not self._stop_event.wait(self._flush_interval):
+            self.flush()
+        self.flush()
+
+    def flush(self):
+        with self._lock:
+            events, self._events = self._events, []
+            suppressed, self._suppressed = self._suppressed, {}
+        if len(suppressed) > 0:
+            events.append((time.time(), "warning", "suppressed", {"counts": suppressed}))
+            self.events_suppressed += sum(suppressed.values())
+        if len(events) == 0:
+            return
+
+        lines = "".join(
+            json.dumps({"time": round(event_time, 6), "level": level, "event": event, **fields},
+                       default=str) + "\n"
+            for event_time, level, event, fields in events
+        )
+        if self.path is None:
+            sys.stderr.write(lines)
+            sys.stderr.flush()
+        else:
+            with open(self.path, "a") as f:
+                f.write(lines)
+        self.events_written += len(events)
+
+    def close(self):
+        # Writes the remaining events and stops the worker
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
+        else:
+            self.flush()
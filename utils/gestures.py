@@ -0,0 +1,90 @@
+class GestureDebouncer(object):
+    """Debounced hand sign of one hand.
+
+    update(probabilities) takes the hand sign classifier output of one
+    frame and returns the accepted hand sign, None until the first one.
+    A class is accepted once it was the most likely class with at least
+    enter_threshold for hold_frames frames in a row. While the accepted
+    class keeps a probability of exit_threshold or more, no other class
+    can take over (hysteresis; 1.0 disables it), and a newly accepted
+    class is kept for at least cooldown_frames frames. hold_frames and
+    cooldown_frames are one value for all classes or one per class, the
+    last one applying to the remaining classes.
+
+    Each update only looks at the current frame and a few counters.
+    latency is the number of frames between the first frame of the last
+    accepted run and its acceptance (latency_seconds with timestamps).
+    """
+
+    def __init__(self, hold_frames=(2, 2, 1, 2), enter_threshold=0.5, exit_threshold=0.3,
+                 cooldown_frames=0):
+        self.hold_frames = _per_class(hold_frames)
+        self.enter_threshold = enter_threshold
+        self.exit_threshold = exit_threshold
+        self.cooldown_frames = _per_class(cooldown_frames)
+
+        self.decisions = 0
+        self.total_latency = 0
+        self.reset()
+
+    def reset(self):
+        # Hand lost: the next hand starts undecided
+        self.gesture = None
+        self.latency = None
+        self.latency_seconds = None
+        self._candidate = None
+        self._candidate_frames = 0
+        self._candidate_time = None
+        self._cooldown = 0
+
+    def update(self, probabilities, timestamp=None):
+        class_id = int(probabilities.argmax())
+        accepted_score = 0.0 if self.gesture is None else float(probabilities[self.gesture])
+        return self.step(class_id, float(probabilities[class_id]), accepted_score, timestamp)
+
+    def update_class(self, class_id, timestamp=None):
+        # For callers without probabilities: the class is certain
+        return self.step(class_id, 1.0, 1.0 if class_id == self.gesture else 0.0, timestamp)
+
+    def step(self, class_id, score, accepted_score, timestamp=None):
+        if self._cooldown > 0:
+            self._cooldown -= 1
+
+        if class_id == self.gesture or score < self.enter_threshold:
+            # A flicker or an uncertain frame ends the candidate's run
+            self._candidate = None
+            self._candidate_frames = 0
+            return self.gesture
+
+        if class_id != self._candidate:
+            self._candidate = class_id
+            self._candidate_frames = 0
+            self._candidate_time = timestamp
+        self._candidate_frames += 1
+
+        if (self._candidate_frames >= _class_value(self.hold_frames, class_id)
+                and self._cooldown == 0 and accepted_score < self.exit_threshold):
+            self.gesture = class_id
+            self.latency = self._candidate_frames - 1
+            self.latency_seconds = None
+            if timestamp is not None and self._candidate_time is not None:
+                self.latency_seconds = timestamp - self._candidate_time
+            self._cooldown = _class_value(self.cooldown_frames, class_id)
+            self._candidate = None
+            self._candidate_frames = 0
+            self.decisions += 1
+            self.total_latency += self.latency
+        return self.gesture
+
+
+def _per_class(values):
+    if isinstance(values, int):
+        return (values, )
+    values = tuple(int(value) for value in values)
+    if len(values) == 0:
+        raise ValueError("Expected at least one value")
+    return values
+
+
+def _class_value(values, class_id):
+    return values[class_id] if class_id < len(values) else values[-1]
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class PointHistory(object):
+    """Fixed-size ring buffer of (x, y) points.
+
+    Every point is stored twice, at i and i + maxlen, so the last maxlen
+    points are always one contiguous slice in chronological order and
+    append() / array() never copy or shift the history.
+    """
+
+    def __init__(self, maxlen=16, dtype=np.int32):
+        self.maxlen = maxlen
+        self._buffer = np.zeros((maxlen * 2, 2), dtype=dtype)
+        self._next = 0
+        self._count = 0
+
+    def append(self, point):
+        index = self._next
+        self._buffer[index] = point
+        self._buffer[index + self.maxlen] = point
+        self._next = index + 1 if index + 1 < self.maxlen else 0
+        if self._count < self.maxlen:
+            self._count += 1
+
+    def array(self):
+        # View of the points, oldest first; only valid until the next append()
+        end = self._next + self.maxlen
+        return self._buffer[end - self._count:end]
+
+    def clear(self):
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def __iter__(self):
+        return iter(self.array())
+
+
+class ModeVote(object):
+    """Most frequent id among the last maxlen ids.
+
+    Keeps a count per id; append() only adjusts the counts of the new and
+    the evicted id, so its cost does not depend on maxlen. On a tie the
+    current mode is kept.
+    """
+
+    def __init__(self, maxlen=16, num_ids=8):
+        # Plain lists: scalar indexing is cheaper than on NumPy arrays
+        self.maxlen = maxlen
+        self._ids = [0] * maxlen
+        self._counts = [0] * num_ids
+        self._next = 0
+        self._count = 0
+        self.mode = None
+
+    def append(self, value):
+        counts = self._counts
+        if value >= len(counts):
+            counts.extend([0] * (value + 1 - len(counts)))
+
+        index = self._next
+        if self._count == self.maxlen:
+            evicted = self._ids[index]
+            counts[evicted] -= 1
+        else:
+            evicted = None
+            self._count += 1
+        self._ids[index] = value
+        self._next = index + 1 if index + 1 < self.maxlen else 0
+        counts[value] += 1
+
+        mode = self.mode
+        if mode is None or counts[value] > counts[mode]:
+            self.mode = value
+        elif evicted == mode and evicted != value:
+            # The mode lost a vote, another id may lead now
+            leader = max(range(len(counts)), key=counts.__getitem__)
+            if counts[leader] > counts[mode]:
+                self.mode = leader
+        return self.mode
+
+    def __len__(self):
+        return self._count
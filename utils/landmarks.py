@@ -0,0 +1,51 @@
+import cv2 as cv
+import numpy as np
+
+NUM_LANDMARKS = 21
+
+
+def landmarks_to_array(landmarks):
+    # NormalizedLandmarkList -> (21, 2) float32 of normalized x, y
+    return np.fromiter(
+        (value for landmark in landmarks.landmark for value in (landmark.x, landmark.y)),
+        dtype=np.float32,
+        count=NUM_LANDMARKS * 2,
+    ).reshape(NUM_LANDMARKS, 2)
+
+
+def calc_landmark_points(landmark_array, image_width, image_height):
+    # Normalized coordinates -> pixel coordinates, clipped like the original
+    # min(int(x * width), width - 1)
+    size = np.array((image_width, image_height), dtype=np.float32)
+    points = (landmark_array * size).astype(np.int32)
+    np.minimum(points, (image_width - 1, image_height - 1), out=points)
+    return points
+
+
+def calc_bounding_rect(landmark_points):
+    x, y, w, h = cv.boundingRect(landmark_points)
+    return [x, y, x + w, y + h]
+
+
+def pre_process_landmark(landmark_points):
+    # Convert to relative coordinates
+    relative = (landmark_points - landmark_points[0]).astype(np.float32).ravel()
+
+    # Normalization
+    max_value = np.abs(relative).max()
+    if max_value > 0:
+        relative /= max_value
+
+    return relative
+
+
+def pre_process_point_history(point_history, image_width, image_height):
+    points = np.asarray(point_history, dtype=np.float32).reshape(-1, 2)
+    if len(points) == 0:
+        return points.ravel()
+
+    # Convert to relative coordinates
+    relative = points - points[0]
+    relative /= np.array((image_width, image_height), dtype=np.float32)
+
+    return relative.ravel()
@@ -0,0 +1,220 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer
+
+# Upper bucket bounds in ms; the last bucket is +Inf
+DEFAULT_BUCKETS_MS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+
+class Histogram(object):
+    """Fixed-bucket histogram of durations in ms.
+
+    observe() is a bisect and two additions, without a lock: every stage
+    is observed by one thread, readers may see a sample half-recorded.
+    """
+
+    def __init__(self, bounds=DEFAULT_BUCKETS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Linear interpolation inside the bucket, like Prometheus'
+        # histogram_quantile(); None without samples
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if count > 0 and cumulative + count >= rank:
+                lower = self.bounds[index - 1] if index > 0 else 0.0
+                if index == len(self.bounds):
+                    return lower
+                return lower + (self.bounds[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+
+class _Measurement(object):
+    # Reusable context manager of one stage
+    __slots__ = ("_metrics", "_stage", "_start")
+
+    def __init__(self, metrics, stage):
+        self._metrics = metrics
+        self._stage = stage
+        self._start = None
+
+    def __enter__(self):
+        self._start = time.perf_counter() if self._metrics.enabled else None
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self._start is not None:
+            self._metrics.observe(self._stage, (time.perf_counter() - self._start) * 1000.0)
+
+
+class Metrics(object):
+    """Per-stage duration histograms that can be switched on and off.
+
+    with metrics.measure("mediapipe"): ... records the duration of the
+    block while enabled is True; while it is False only a flag is read.
+    """
+
+    def __init__(self, enabled=True, bounds=DEFAULT_BUCKETS_MS):
+        self.enabled = enabled
+        self.bounds = tuple(bounds)
+        self.histograms = {}
+        self._measurements = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage, elapsed_ms):
+        if not self.enabled:
+            return
+        histogram = self.histograms.get(stage)
+        if histogram is None:
+            with self._lock:
+                histogram = self.histograms.setdefault(stage, Histogram(self.bounds))
+        histogram.observe(elapsed_ms)
+
+    def measure(self, stage):
+        # Not reentrant per stage: one thread, one block at a time
+        measurement = self._measurements.get(stage)
+        if measurement is None:
+            measurement = self._measurements[stage] = _Measurement(self, stage)
+        return measurement
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}
+
+    def snapshot(self):
+        stages = {}
+        for stage, histogram in list(self.histograms.items()):
+            if histogram.count == 0:
+                continue
+            stages[stage] = {
+                "count": histogram.count,
+                "mean_ms": round(histogram.sum / histogram.count, 4),
+                "p50_ms": round(histogram.quantile(0.5), 4),
+                "p95_ms": round(histogram.quantile(0.95), 4),
+                "p99_ms": round(histogram.quantile(0.99), 4),
+                "buckets_ms": list(histogram.bounds),
+                "counts": list(histogram.counts),
+            }
+        return {"time": time.time(), "enabled": self.enabled, "stages": stages}
+
+    def to_json(self):
+        return json.dumps(self.snapshot())
+
+    def to_prometheus(self, prefix="hand_gesture"):
+        # Text exposition format, durations in seconds
+        name = f"{prefix}_stage_duration_seconds"
+        lines = [
+            f"# HELP {prefix}_metrics_enabled Whether stage durations are recorded",
+            f"# TYPE {prefix}_metrics_enabled gauge",
+            f"{prefix}_metrics_enabled {int(self.enabled)}",
+            f"# HELP {name} Duration of each processing stage",
+            f"# TYPE {name} histogram",
+        ]
+        for stage, histogram in sorted(list(self.histograms.items())):
+            counts = list(histogram.counts)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                lines.append(f'{name}_bucket{{stage="{stage}",le="{bound / 1000.0:g}"}} {cumulative}')
+            lines.append(f'{name}_bucket{{stage="{stage}",le="+Inf"}} {sum(counts)}')
+            lines.append(f'{name}_sum{{stage="{stage}"}} {histogram.sum / 1000.0:.6f}')
+            lines.append(f'{name}_count{{stage="{stage}"}} {histogram.count}')
+        return "\n".join(lines) + "\n"
+
+
+class _MetricsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        metrics = self.server.metrics
+        path = self.path.split("?", 1)[0]
+        if path == "/metrics":
+            self._reply(metrics.to_prometheus(), "text/plain; version=0.0.4")
+        elif path == "/metrics.json":
+            self._reply(metrics.to_json(), "application/json")
+        elif path in ("/enable", "/disable"):
+            metrics.enabled = path == "/enable"
+            self._reply(f"enabled {metrics.enabled}\n", "text/plain")
+        elif path == "/reset":
+            metrics.reset()
+            self._reply("reset\n", "text/plain")
+        else:
+            self.send_error(404)
+
+    def _reply(self, body, content_type):
+        body = body.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # No line per request on stderr
+
+
+class MetricsServer(threading.Thread):
+    """Serves a Metrics object over HTTP.
+
+    GET /metrics       Prometheus text format
+    GET /metrics.json  snapshot() as JSON
+    GET /enable, /disable, /reset  switch recording at runtime
+    """
+
+    def __init__(self, metrics, host="127.0.0.1", port=9100):
+        super().__init__(name="metrics_server", daemon=True)
+        self.metrics = metrics
+        self._server = ThreadingHTTPServer((host, port), _MetricsRequestHandler)
+        self._server.metrics = metrics
+        self.port = self._server.server_address[1]
+
+    def run(self):
+        self._server.serve_forever()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+class MetricsDumper(threading.Thread):
+    """Writes Metrics.snapshot() as JSON to path every interval seconds.
+
+    The file is replaced atomically, so readers never see a partial dump.
+    """
+
+    def __init__(self, metrics, path, interval=5.0):
+        super().__init__(name="metrics_dumper", daemon=True)
+        self.metrics = metrics
+        self.path = path
+        self.interval = interval
+        self._stop_event = threading.Event()
+
+    def run(self):
+        while not self._stop_event.wait(self.interval):
+            self.dump()
+        self.dump()
+
+    def dump(self):
+        temp_path = self.path + ".tmp"
+        with open(temp_path, "w") as f:
+            f.write(self.metrics.to_json())
+        os.replace(temp_path, self.path)
+
+    def stop(self):
+        self._stop_event.set()
+        if self.is_alive():
+            self.join()
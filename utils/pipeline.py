@@ -0,0 +1,269 @@
+import time
+import asyncio
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+import cv2 as cv
+
+
+class RingBuffer(object):
+    """Thread-safe bounded buffer that drops the oldest item when full."""
+
+    def __init__(self, maxlen=2):
+        self._items = deque(maxlen=maxlen)
+        self._cond = threading.Condition()
+        self._closed = False
+        self.dropped = 0
+
+    def put(self, item):
+        with self._cond:
+            if len(self._items) == self._items.maxlen:
+                self.dropped += 1
+            self._items.append(item)
+            self._cond.notify()
+
+    def get(self, timeout=None):
+        with self._cond:
+            self._cond.wait_for(lambda: self._items or self._closed, timeout)
+            if not self._items:
+                return None
+            return self._items.popleft()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        with self._cond:
+            return self._closed and not self._items
+
+
+class ZipBuffer(object):
+    """Source yielding one item from each of several RingBuffers as a tuple.
+
+    Used to feed frames from multiple cameras into a single stage. Items
+    already taken are kept until the remaining buffers deliver.
+    """
+
+    def __init__(self, buffers):
+        self._buffers = buffers
+        self._pending = [None] * len(buffers)
+
+    def get(self, timeout=None):
+        for index, buffer in enumerate(self._buffers):
+            if self._pending[index] is None:
+                self._pending[index] = buffer.get(timeout)
+                if self._pending[index] is None:
+                    return None
+
+        items = tuple(self._pending)
+        self._pending = [None] * len(self._buffers)
+        return items
+
+    @property
+    def closed(self):
+        return any(buffer.closed for buffer in self._buffers)
+
+
+class StageTimer(object):
+    """Moving average of the time spent in each pipeline stage (ms).
+
+    With metrics (utils.Metrics) every sample is also recorded in the
+    stage's histogram.
+    """
+
+    def __init__(self, buffer_len=30, metrics=None):
+        self._buffer_len = buffer_len
+        self._times = {}
+        self._lock = threading.Lock()
+        self._metrics = metrics
+
+    def add(self, stage, elapsed_ms):
+        if self._metrics is not None:
+            self._metrics.observe(stage, elapsed_ms)
+        with self._lock:
+            times = self._times.get(stage)
+            if times is None:
+                times = self._times[stage] = deque(maxlen=self._buffer_len)
+            times.append(elapsed_ms)
+
+    @contextmanager
+    def measure(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, (time.perf_counter() - start) * 1000.0)
+
+    def get(self):
+        with self._lock:
+            return {
+                stage: round(sum(times) / len(times), 2)
+                for stage, times in self._times.items()
+                if len(times) > 0
+            }
+
+
+class CaptureThread(threading.Thread):
+    """Reads frames from a cv.VideoCapture into a drop-oldest RingBuffer.
+
+    Items are (frame_id, capture_time, image) tuples; capture_time is taken
+    from time.perf_counter() right after cap.read() returns, or is the
+    cap's own capture_time (CameraWorker).
+    """
+
+    def __init__(self, cap, buffer, timer=None, flip=True, name="capture"):
+        super().__init__(name=name, daemon=True)
+        self._cap = cap
+        self._buffer = buffer
+        self._timer = timer
+        self._flip = flip
+        self._stop_event = threading.Event()
+
+    def run(self):
+        frame_id = 0
+        try:
+            while not self._stop_event.is_set():
+                start = time.perf_counter()
+                ret, image = self._cap.read()
+                capture_time = time.perf_counter()
+                if not ret:
+                    break
+                # Camera workers report when they captured the frame
+                capture_time = getattr(self._cap, "capture_time", None) or capture_time
+                if self._flip:
+                    cv.flip(image, 1, dst=image)  # Mirror display, in place
+                if self._timer is not None:
+                    self._timer.add(self.name, (time.perf_counter() - start) * 1000.0)
+
+                self._buffer.put((frame_id, capture_time, image))
+                frame_id += 1
+        finally:
+            self._buffer.close()
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class StageThread(threading.Thread):
+    """Runs func on every item of source and forwards results to sinks.
+
+    Sinks are objects with put()/close() (RingBuffer, AsyncOutputThread).
+    A func returning None produces no output for that item. An exception
+    in func ends the thread, closes the sinks and is kept in error; the
+    owner calls raise_error() after join(), as with AsyncOutputThread.
+    """
+
+    def __init__(self, name, func, source, sinks, timer=None):
+        super().__init__(name=name, daemon=True)
+        self._func = func
+        self._source = source
+        self._sinks = sinks
+        self._timer = timer
+        self._stop_event = threading.Event()
+        self.error = None
+
+    def run(self):
+        try:
+            while not self._stop_event.is_set():
+                item = self._source.get(timeout=0.1)
+                if item is None:
+                    if self._source.closed:
+                        break
+                    continue
+
+                start = time.perf_counter()
+                result = self._func(item)
+                if self._timer is not None:
+                    self._timer.add(self.name, (time.perf_counter() - start) * 1000.0)
+
+                if result is None:
+                    continue
+                for sink in self._sinks:
+                    sink.put(result)
+        except BaseException as e:
+            self.error = e
+        finally:
+            for sink in self._sinks:
+                sink.close()
+
+    def raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"{self.name}: stage failed") from self.error
+
+    def stop(self):
+        self._stop_event.set()
+
+
+class AsyncOutputThread(threading.Thread):
+    """Owns an asyncio event loop and feeds the latest item to an async handler.
+
+    setup is a coroutine function run inside the thread's loop; it returns
+    the async callable that handles each item. Only the newest pending item
+    is kept, so a slow consumer never builds up latency. An exception in
+    setup or in the handler ends the thread and is kept in error; the
+    owner checks is_alive() and calls raise_error().
+    """
+
+    _CLOSE = object()
+
+    def __init__(self, name, setup, timer=None):
+        super().__init__(name=name, daemon=True)
+        self._setup = setup
+        self._timer = timer
+        self._loop = None
+        self._queue = None
+        self._ready = threading.Event()
+        self.dropped = 0
+        self.error = None
+
+    def run(self):
+        try:
+            asyncio.run(self._main())
+        except BaseException as e:
+            self.error = e
+        finally:
+            self._ready.set()  # put() must not wait for a failed start
+
+    def raise_error(self):
+        if self.error is not None:
+            raise RuntimeError(f"{self.name}: output thread failed") from self.error
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=1)
+        self._ready.set()
+
+        handle = await self._setup()
+        while True:
+            item = await self._queue.get()
+            if item is self._CLOSE:
+                break
+
+            start = time.perf_counter()
+            await handle(item)
+            if self._timer is not None:
+                self._timer.add(self.name, (time.perf_counter() - start) * 1000.0)
+
+    def _put_latest(self, item):
+        if self._queue.full():
+            if self._queue.get_nowait() is self._CLOSE:
+                item = self._CLOSE
+            else:
+                self.dropped += 1
+        self._queue.put_nowait(item)
+
+    def put(self, item):
+        self._ready.wait()
+        if self._loop is None:
+            return  # Failed before its loop ran
+        try:
+            self._loop.call_soon_threadsafe(self._put_latest, item)
+        except RuntimeError:
+            pass  # Loop already finished
+
+    def close(self):
+        self.put(self._CLOSE)
@@ -0,0 +1,74 @@
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+
+from utils.landmarks import landmarks_to_array
+from utils.replay import HANDEDNESS_LABELS
+from utils.replay import ReplayResults
+
+
+class FramePreprocessor(object):
+    """Turns captured BGR frames into the RGB input of MediaPipe Hands.
+
+    The frame is downscaled to inference_width (aspect ratio kept; 0 keeps
+    the capture size) and converted to RGB. Both steps write into buffers
+    that are allocated once and reused, so the returned image is only
+    valid until the next call. Mirroring is left to the caller: the
+    display path flips the captured frame in place, the headless path
+    mirrors the results (mirror_results).
+    """
+
+    def __init__(self, inference_width=0):
+        self.inference_width = inference_width
+        self._resized = None
+        self._rgb = None
+
+    def __call__(self, image):
+        height, width = image.shape[:2]
+        if 0 < self.inference_width < width:
+            size = (self.inference_width, max(round(height * self.inference_width / width), 1))
+            self._resized = _buffer(self._resized, (size[1], size[0], 3))
+            image = cv.resize(image, size, dst=self._resized, interpolation=cv.INTER_LINEAR)
+
+        self._rgb = _buffer(self._rgb, image.shape)
+        self._rgb.flags.writeable = True
+        cv.cvtColor(image, cv.COLOR_BGR2RGB, dst=self._rgb)
+        # Lets MediaPipe use the pixels without copying them
+        self._rgb.flags.writeable = False
+        return self._rgb
+
+
+def _buffer(buffer, shape):
+    if buffer is None or buffer.shape != shape:
+        buffer = np.empty(shape, dtype=np.uint8)
+    return buffer
+
+
+def mirror_results(results):
+    """Results of an unmirrored frame as if the frame had been mirrored.
+
+    Mirrors the landmark x coordinates and swaps the handedness, so the
+    pixels never need to be flipped when nothing is displayed. The
+    landmarks are returned as (21, 2) arrays, like ReplayResults.
+    """
+    if results.multi_hand_landmarks is None:
+        return ReplayResults(None, None)
+
+    multi_hand_landmarks = []
+    for hand_landmarks in results.multi_hand_landmarks:
+        if isinstance(hand_landmarks, np.ndarray):
+            landmark_array = hand_landmarks.copy()
+        else:
+            landmark_array = landmarks_to_array(hand_landmarks)
+        landmark_array[:, 0] = 1.0 - landmark_array[:, 0]
+        multi_hand_landmarks.append(landmark_array)
+
+    multi_handedness = []
+    for handedness in results.multi_handedness:
+        classification = handedness.classification[0]
+        index = 1 - HANDEDNESS_LABELS.index(classification.label)
+        multi_handedness.append(SimpleNamespace(classification=[
+            SimpleNamespace(index=index, score=classification.score, label=HANDEDNESS_LABELS[index])
+        ]))
+    return ReplayResults(multi_hand_landmarks, multi_handedness)
@@ -0,0 +1,201 @@
+import json
+import os
+import time
+from collections import namedtuple
+from types import SimpleNamespace
+
+import cv2 as cv
+import numpy as np
+
+# Handedness labels as reported by MediaPipe, index = stored value
+HANDEDNESS_LABELS = ("Left", "Right")
+
+# Same fields as the MediaPipe Hands results used by the app; the hand
+# landmarks are (21, 2) arrays of normalized x, y
+ReplayResults = namedtuple("ReplayResults", ["multi_hand_landmarks", "multi_handedness"])
+
+
+class _Pacer(object):
+    # Sleeps until a frame's timestamp when replaying in real time
+    def __init__(self, realtime):
+        self._realtime = realtime
+        self._start = None
+
+    def wait(self, timestamp):
+        if not self._realtime:
+            return
+        now = time.perf_counter()
+        if self._start is None:
+            self._start = now - timestamp
+        delay = self._start + timestamp - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+class VideoReplay(object):
+    """cv.VideoCapture of a video file, paced at the file's frame rate.
+
+    With realtime=False frames are returned as fast as they decode.
+    """
+
+    def __init__(self, path, realtime=True):
+        self._cap = cv.VideoCapture(path)
+        if not self._cap.isOpened():
+            raise FileNotFoundError(f"Cannot open video {path}")
+        fps = self._cap.get(cv.CAP_PROP_FPS)
+        self._frame_interval = 1.0 / fps if fps > 0 else 1.0 / 30
+        self._pacer = _Pacer(realtime)
+        self._frame_id = 0
+
+    def read(self):
+        self._pacer.wait(self._frame_id * self._frame_interval)
+        self._frame_id += 1
+        return self._cap.read()
+
+    def set(self, prop_id, value):
+        # Capture size cannot be changed for a file
+        return False
+
+    def get(self, prop_id):
+        return self._cap.get(prop_id)
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def release(self):
+        self._cap.release()
+
+
+# Arrays of a landmark cache directory, one .npy file each
+CACHE_ARRAYS = ("landmarks", "hand_count", "handedness", "scores", "timestamps")
+
+
+def save_landmark_stream(path, landmarks, hand_count, handedness, timestamps, image_size):
+    """Write a landmark stream for LandmarkReplay.
+
+    landmarks: (frames, max_hands, 21, 2) normalized x, y as returned by
+    MediaPipe, hand_count: (frames,) detected hands per frame,
+    handedness: (frames, max_hands) index into HANDEDNESS_LABELS,
+    timestamps: (frames,) seconds, image_size: (width, height).
+    """
+    np.savez_compressed(
+        path,
+        landmarks=np.asarray(landmarks, dtype=np.float32),
+        hand_count=np.asarray(hand_count, dtype=np.int8),
+        handedness=np.asarray(handedness, dtype=np.int8),
+        timestamps=np.asarray(timestamps, dtype=np.float64),
+        image_size=np.asarray(image_size, dtype=np.int32),
+    )
+
+
+def save_landmark_cache(path, landmarks, hand_count, handedness, scores, timestamps, image_size):
+    """Write a landmark cache directory for LandmarkReplay / load_landmark_cache.
+
+    Same arrays as save_landmark_stream plus scores: (frames, max_hands)
+    handedness scores. Each array is an uncompressed .npy file so that it
+    can be memory-mapped; image_size goes to meta.json.
+    """
+    os.makedirs(path, exist_ok=True)
+    arrays = {
+        "landmarks": np.asarray(landmarks, dtype=np.float32),
+        "hand_count": np.asarray(hand_count, dtype=np.int8),
+        "handedness": np.asarray(handedness, dtype=np.int8),
+        "scores": np.asarray(scores, dtype=np.float32),
+        "timestamps": np.asarray(timestamps, dtype=np.float64),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, name + ".npy"), array)
+
+    with open(os.path.join(path, "meta.json"), "w", encoding="utf-8") as f:
+        json.dump({"image_size": [int(value) for value in image_size], "frames": len(arrays["timestamps"])}, f)
+
+
+def load_landmark_cache(path):
+    # Memory-mapped arrays of a landmark cache directory, plus its image size
+    with open(os.path.join(path, "meta.json"), encoding="utf-8") as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r")
+        for name in CACHE_ARRAYS
+    }
+    return arrays, tuple(meta["image_size"])
+
+
+class LandmarkReplay(object):
+    """Replays landmarks in place of a camera and MediaPipe.
+
+    path is a landmark stream (.npz, loaded into memory) or a landmark
+    cache directory (memory-mapped). read() returns a blank image of the
+    recorded size, results(frame_id) the recorded hands of that frame.
+    With realtime=False frames are returned without waiting for their
+    timestamps.
+    """
+
+    def __init__(self, path, realtime=True):
+        if os.path.isdir(path):
+            arrays, image_size = load_landmark_cache(path)
+            self.scores = arrays["scores"]
+        else:
+            with np.load(path) as data:
+                arrays = {name: data[name] for name in CACHE_ARRAYS if name in data}
+                image_size = data["image_size"]
+            self.scores = None
+        self.landmarks = arrays["landmarks"]
+        self.hand_count = arrays["hand_count"]
+        self.handedness = arrays["handedness"]
+        self.timestamps = arrays["timestamps"]
+        self.width, self.height = (int(value) for value in image_size)
+
+        self._handedness = [
+            SimpleNamespace(classification=[SimpleNamespace(index=index, score=1.0, label=label)])
+            for index, label in enumerate(HANDEDNESS_LABELS)
+        ]
+        self._image = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        self._pacer = _Pacer(realtime)
+        self._frame_id = 0
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def read(self):
+        if self._frame_id >= len(self):
+            return False, None
+        self._pacer.wait(self.timestamps[self._frame_id])
+        self._frame_id += 1
+        # Readers may draw on the image
+        self._image.fill(0)
+        return True, self._image
+
+    def results(self, frame_id):
+        hand_count = int(self.hand_count[frame_id])
+        if hand_count == 0:
+            return ReplayResults(None, None)
+        handedness = self.handedness[frame_id, :hand_count]
+        if self.scores is None:
+            multi_handedness = [self._handedness[index] for index in handedness]
+        else:
+            multi_handedness = [
+                SimpleNamespace(classification=[
+                    SimpleNamespace(index=int(index), score=float(score), label=HANDEDNESS_LABELS[index])
+                ])
+                for index, score in zip(handedness, self.scores[frame_id, :hand_count])
+            ]
+        return ReplayResults(list(self.landmarks[frame_id, :hand_count]), multi_handedness)
+
+    def set(self, prop_id, value):
+        return False
+
+    def get(self, prop_id):
+        if prop_id == cv.CAP_PROP_FRAME_WIDTH:
+            return self.width
+        if prop_id == cv.CAP_PROP_FRAME_HEIGHT:
+            return self.height
+        if prop_id == cv.CAP_PROP_FRAME_COUNT:
+            return len(self)
+        return 0
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
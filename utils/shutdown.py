@@ -0,0 +1,19 @@
+import signal
+import threading
+
+
+def install_shutdown_handler(signals=(signal.SIGINT, signal.SIGTERM)):
+    """Return a threading.Event that is set on SIGINT/SIGTERM.
+
+    Used instead of polling cv.waitKey for ESC when no window is shown.
+    Must be called from the main thread.
+    """
+    shutdown_event = threading.Event()
+
+    def handler(signum, frame):
+        shutdown_event.set()
+
+    for signum in signals:
+        signal.signal(signum, handler)
+
+    return shutdown_event
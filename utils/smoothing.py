@@ -0,0 +1,184 @@
+import math
+
+import numpy as np
+
+
+class _PointFilter(object):
+    # Shared state of the pointer filters: filtered positions and
+    # velocities of N points with D coordinates, float64 (N, D), and the
+    # keys of the points when update() was given some
+    def __init__(self, max_prediction=0.1, reset_after=0.5):
+        self.max_prediction = max_prediction
+        self.reset_after = reset_after
+        self.position = None
+        self.velocity = None
+        self.timestamp = None
+        self.keys = None
+
+    def _match(self, values, timestamp, keys):
+        # Lines the state up with the rows of values and returns the (N, )
+        # mask of the rows without history to smooth with: all of them on
+        # the first sample or after a long gap, else those with a new key
+        # (without keys: all of them when the number of points changed).
+        # Points whose key is gone are dropped. None when every row
+        # continues as it was, the common case.
+        if keys is not None:
+            keys = list(keys)
+        if (self.position is None or timestamp - self.timestamp > self.reset_after
+                or self.position.shape[1:] != values.shape[1:]
+                or (keys is None) != (self.keys is None)):
+            rows = np.full(len(values), -1)
+        elif keys is None:
+            if self.position.shape == values.shape:
+                return None
+            rows = np.full(len(values), -1)
+        elif keys == self.keys:
+            return None
+        else:
+            previous = {key: row for row, key in enumerate(self.keys)}
+            rows = np.array([previous.get(key, -1) for key in keys], dtype=np.intp)
+
+        fresh = rows < 0
+        if fresh.all():
+            self._create(values.shape)
+            self.timestamp = timestamp
+        else:
+            self._select(rows)
+        self._initialise(fresh, values)
+        self.keys = keys
+        return fresh
+
+    def _create(self, shape):
+        self.position = np.empty(shape)
+        self.velocity = np.empty(shape)
+
+    def _select(self, rows):
+        # Rows of -1 are initialised afterwards
+        self.position = self.position[rows]
+        self.velocity = self.velocity[rows]
+
+    def _initialise(self, fresh, values):
+        # At the measurement, at rest
+        self.position[fresh] = values[fresh]
+        self.velocity[fresh] = 0.0
+
+    def predict(self, timestamp):
+        # Positions extrapolated to timestamp along the filtered velocity,
+        # at most max_prediction seconds ahead of the last sample
+        if self.position is None:
+            return None
+        horizon = min(max(timestamp - self.timestamp, 0.0), self.max_prediction)
+        return self.position + self.velocity * horizon
+
+    def reset(self):
+        self.position = None
+        self.velocity = None
+        self.timestamp = None
+        self.keys = None
+
+
+class OneEuroFilter(_PointFilter):
+    """One-Euro filter of N points at once.
+
+    update(values, timestamp, keys=None) takes an (N, D) array of raw
+    coordinates and returns the filtered ones; every coordinate has its
+    own adaptive cutoff, min_cutoff + beta * |velocity|, so slow movements
+    are smoothed strongly and fast ones follow with little lag. min_cutoff
+    and d_cutoff are in Hz, beta per coordinate unit. keys, one per row,
+    identify the points across updates, so points may come and go; without
+    them the rows are matched by position.
+    """
+
+    def __init__(self, min_cutoff=1.0, beta=0.007, d_cutoff=1.0, max_prediction=0.1,
+                 reset_after=0.5):
+        super().__init__(max_prediction, reset_after)
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+
+    def update(self, values, timestamp, keys=None):
+        values = np.asarray(values, dtype=np.float64)
+        fresh = self._match(values, timestamp, keys)
+        dt = timestamp - self.timestamp
+        if (fresh is not None and fresh.all()) or dt <= 0:
+            return self.position
+
+        velocity = (values - self.position) / dt
+        self.velocity += _alpha(self.d_cutoff, dt) * (velocity - self.velocity)
+        cutoff = self.min_cutoff + self.beta * np.abs(self.velocity)
+        self.position += _alpha(cutoff, dt) * (values - self.position)
+        if fresh is not None:
+            self._initialise(fresh, values)
+        self.timestamp = timestamp
+        return self.position
+
+
+class KalmanFilter(_PointFilter):
+    """Constant-velocity Kalman filter of N points at once.
+
+    Every coordinate is an independent (position, velocity) state with
+    white-noise acceleration of standard deviation acceleration and a
+    measurement noise of standard deviation measurement_noise. The
+    coordinates of a point are measured together with the same noise, so
+    they share one 2x2 covariance and one gain per point; the update is a
+    few array operations whatever N is. keys work as in OneEuroFilter.
+    """
+
+    def __init__(self, measurement_noise=3.0, acceleration=2000.0, max_prediction=0.1,
+                 reset_after=0.5):
+        super().__init__(max_prediction, reset_after)
+        self.measurement_variance = measurement_noise ** 2
+        self.acceleration_variance = acceleration ** 2
+        self._covariance = None  # Rows p00, p01, p11 of every point, (3, N)
+
+    def _create(self, shape):
+        super()._create(shape)
+        self._covariance = np.empty((3, shape[0]))
+
+    def _select(self, rows):
+        super()._select(rows)
+        self._covariance = self._covariance[:, rows]
+
+    def _initialise(self, fresh, values):
+        # Position known to the measurement noise, velocity unknown
+        super()._initialise(fresh, values)
+        self._covariance[:, fresh] = (
+            (self.measurement_variance, ), (0.0, ), (self.acceleration_variance, ))
+
+    def update(self, values, timestamp, keys=None):
+        values = np.asarray(values, dtype=np.float64)
+        fresh = self._match(values, timestamp, keys)
+        dt = timestamp - self.timestamp
+        if (fresh is not None and fresh.all()) or dt <= 0:
+            return self.position
+
+        # Predict: the covariance of all points in one product
+        q = self.acceleration_variance
+        transition = np.array(((1.0, 2 * dt, dt * dt), (0.0, 1.0, dt), (0.0, 0.0, 1.0)))
+        noise = np.array(((q * dt ** 4 / 4, ), (q * dt ** 3 / 2, ), (q * dt ** 2, )))
+        covariance = transition @ self._covariance + noise
+        self.position += self.velocity * dt
+
+        # Correct; gains are (position, velocity) of every point
+        gains = covariance[:2] / (covariance[0] + self.measurement_variance)
+        innovation = values - self.position
+        self.position += gains[0, :, None] * innovation
+        self.velocity += gains[1, :, None] * innovation
+        covariance[2] -= gains[1] * covariance[1]
+        covariance[:2] *= 1 - gains[0]
+        self._covariance = covariance
+        if fresh is not None:
+            self._initialise(fresh, values)
+        self.timestamp = timestamp
+        return self.position
+
+    def reset(self):
+        super().reset()
+        self._covariance = None
+
+
+def _alpha(cutoff, dt):
+    # Smoothing factor of an exponential filter with this cutoff (Hz);
+    # cutoff may be an array
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return dt / (dt + tau)
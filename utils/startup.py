@@ -0,0 +1,43 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class StartupTimer(object):
+    """Startup timing breakdown.
+
+    Steps (measure(), run()) record their own duration and may run in
+    parallel threads; milestones (mark()) record the seconds since start,
+    only the first time they are reached.
+    """
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.steps = {}
+        self.milestones = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def measure(self, step):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.steps[step] = time.perf_counter() - start
+
+    def run(self, step, func, *args, **kwargs):
+        with self.measure(step):
+            return func(*args, **kwargs)
+
+    def mark(self, milestone):
+        with self._lock:
+            if milestone in self.milestones:
+                return False
+            self.milestones[milestone] = time.perf_counter() - self.start
+            return True
+
+    def report(self):
+        steps = ", ".join(f"{step} {elapsed:.2f}" for step, elapsed in self.steps.items())
+        milestones = ", ".join(f"{name} {elapsed:.2f}" for name, elapsed in self.milestones.items())
+        return f"Startup (s): {steps} | since start: {milestones}"
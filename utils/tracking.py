@@ -0,0 +1,47 @@
+import itertools
+
+
+class HandSlots(object):
+    """Hand numbers that stay with the same hand from frame to frame.
+
+    MediaPipe lists the hands of a frame in no fixed order, so the list
+    index of a hand may change when several hands are visible. assign()
+    matches the hands of a source to the hands of its previous frame,
+    nearest wrist first and at most max_distance (a fraction of the image
+    width) apart, and returns the number of each hand. Unmatched hands get
+    the lowest number that neither a matched hand nor a hand of the
+    previous frame has, so a new hand never takes over the state (point
+    history, pointer filter row) of a hand that just left, and the numbers
+    stay small.
+    """
+
+    def __init__(self, max_distance=0.25):
+        self.max_distance = max_distance
+        self._wrists = {}  # source -> {hand number: (x, y)} of the previous frame
+
+    def assign(self, source, wrists, image_width):
+        # wrists: (x, y) pixels of every hand in list order; [] without hands
+        previous = self._wrists.get(source, {})
+        limit = (self.max_distance * image_width) ** 2
+        pairs = sorted(
+            ((x - px) ** 2 + (y - py) ** 2, index, number)
+            for index, (x, y) in enumerate(wrists)
+            for number, (px, py) in previous.items()
+        )
+
+        numbers = [None] * len(wrists)
+        used = set()
+        for distance, index, number in pairs:
+            if distance > limit:
+                break
+            if numbers[index] is None and number not in used:
+                numbers[index] = number
+                used.add(number)
+
+        taken = used | previous.keys()
+        free = (number for number in itertools.count() if number not in taken)
+        numbers = [next(free) if number is None else number for number in numbers]
+        self._wrists[source] = {
+            number: (float(x), float(y)) for number, (x, y) in zip(numbers, wrists)
+        }
+        return numbers
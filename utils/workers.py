@@ -0,0 +1,288 @@
+import multiprocessing
+import signal
+import time
+from types import SimpleNamespace
+from multiprocessing import shared_memory
+
+import numpy as np
+
+from utils.landmarks import NUM_LANDMARKS
+from utils.replay import HANDEDNESS_LABELS
+from utils.replay import ReplayResults
+
+# Header slots (float64): seqlock counter, hand count, capture time
+_SEQ, _HAND_COUNT, _CAPTURE_TIME = range(3)
+_HEADER_LEN = 3
+
+# Results of the last few frames, for readers that lag behind read()
+_KEPT_RESULTS = 8
+
+
+class _SharedResults(object):
+    # Views of one camera's shared memory block:
+    # header | landmarks (max_hands, 21, 2) | handedness | scores | frame
+    def __init__(self, buffer, max_hands, frame_shape):
+        offset = 0
+
+        def view(dtype, shape):
+            nonlocal offset
+            array = np.ndarray(shape, dtype=dtype, buffer=buffer, offset=offset)
+            offset += array.nbytes
+            return array
+
+        self.header = view(np.float64, (_HEADER_LEN, ))
+        self.landmarks = view(np.float32, (max_hands, NUM_LANDMARKS, 2))
+        self.handedness = view(np.float64, (max_hands, ))
+        self.scores = view(np.float64, (max_hands, ))
+        self.frame = view(np.uint8, frame_shape) if frame_shape is not None else None
+
+    @staticmethod
+    def size(max_hands, frame_shape):
+        frame_size = int(np.prod(frame_shape)) if frame_shape is not None else 0
+        return 8 * (_HEADER_LEN + 2 * max_hands) + 4 * max_hands * NUM_LANDMARKS * 2 + frame_size
+
+
+def _run_worker(setup, conn, max_hands, share_frames, stop_event, new_data, consumed):
+    # Worker process: capture and hand detection, results into shared memory
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # The controller stops us
+
+    cap, detect = setup()
+    ret, image = cap.read()
+    if not ret:
+        conn.send(None)
+        return
+    frame_shape = image.shape if share_frames else None
+    conn.send(image.shape)
+
+    # The controller owns the block and unlinks it, also after a crash
+    memory = shared_memory.SharedMemory(name=conn.recv())
+    shared = _SharedResults(memory.buf, max_hands, frame_shape)
+
+    try:
+        while not stop_event.is_set():
+            capture_time = time.perf_counter()
+            results = detect(image)
+
+            hand_count = 0
+            if results.multi_hand_landmarks is not None:
+                hand_count = min(len(results.multi_hand_landmarks), max_hands)
+
+            if consumed is not None and shared.header[_SEQ] > 0:
+                # Lockstep: this frame is ready, publish it once the
+                # controller has read the previous one
+                while not consumed.wait(0.1):
+                    if stop_event.is_set():
+                        return
+                consumed.clear()
+
+            # Seqlock: odd while writing
+            shared.header[_SEQ] += 1
+            for index in range(hand_count):
+                shared.landmarks[index] = results.multi_hand_landmarks[index]
+                classification = results.multi_handedness[index].classification[0]
+                shared.handedness[index] = HANDEDNESS_LABELS.index(classification.label)
+                shared.scores[index] = classification.score
+            shared.header[_HAND_COUNT] = hand_count
+            shared.header[_CAPTURE_TIME] = capture_time
+            if shared.frame is not None:
+                shared.frame[...] = image
+            shared.header[_SEQ] += 1
+            new_data.set()
+
+            ret, image = cap.read()
+            if not ret:
+                break
+    finally:
+        del shared
+        memory.close()
+        cap.release()
+
+
+class CameraWorker(object):
+    """Capture and hand detection of one camera in its own process.
+
+    setup is a picklable callable that runs in the worker and returns
+    (cap, detect), detect(image) returning results with (21, 2) landmark
+    arrays (see app.create_worker_camera). The worker publishes the newest
+    landmarks (and, with share_frames, the frame) in shared memory.
+
+    Used like LandmarkReplay: read() waits for the next frame the worker
+    published and results(frame_id) returns its hands. Cameras run freely
+    and the controller gets the newest frame; with lockstep the worker
+    waits until each frame was read (video files at full speed). When the worker
+    crashes it is restarted; until it is back read() returns frames
+    without hands, so the DMX output keeps running.
+    """
+
+    def __init__(self, setup, max_num_hands=1, share_frames=True, lockstep=False, restart=True,
+                 events=None, name="camera"):
+        self.name = name
+        self.max_num_hands = max_num_hands
+        self.share_frames = share_frames
+        self.lockstep = lockstep
+        self.restart = restart
+        self.events = events
+        self.restarts = 0
+        self.capture_time = None
+
+        self._setup = setup
+        self._context = multiprocessing.get_context("spawn")
+        self._process = None
+        self._memory = None
+        self._shared = None
+        self._reads = 0
+        self._last_seq = 0
+        self._results = {}
+        self._image = None
+        self._start()
+        # Wait for the first start, so that a wrong device fails here
+        while self._shared is None:
+            if not self._connect(timeout=1.0) and not self._process.is_alive():
+                raise RuntimeError(f"{name}: worker exited with code {self._process.exitcode}")
+
+    def _start(self):
+        self._conn, child_conn = self._context.Pipe()
+        self._stop_event = self._context.Event()
+        self._new_data = self._context.Event()
+        self._consumed = self._context.Event() if self.lockstep else None
+        self._process = self._context.Process(
+            target=_run_worker,
+            args=(self._setup, child_conn, self.max_num_hands, self.share_frames, self._stop_event,
+                  self._new_data, self._consumed),
+            name=self.name,
+            daemon=True,
+        )
+        self._process.start()
+        self._start_time = time.monotonic()
+        child_conn.close()
+
+    def _connect(self, timeout=0.0):
+        # Handshake: the worker sends its frame shape, we send the block name
+        if not self._conn.poll(timeout):
+            return False
+        try:
+            frame_shape = self._conn.recv()
+        except EOFError:
+            return False
+        if frame_shape is None:
+            raise RuntimeError(f"{self.name}: no frame from the capture device")
+
+        shared_frame_shape = tuple(frame_shape) if self.share_frames else None
+        size = _SharedResults.size(self.max_num_hands, shared_frame_shape)
+        self._memory = shared_memory.SharedMemory(create=True, size=size)
+        self._shared = _SharedResults(self._memory.buf, self.max_num_hands, shared_frame_shape)
+        self._shared.header[:] = 0
+        self._last_seq = 0
+        if self._image is None:
+            self._image = np.zeros(frame_shape, dtype=np.uint8)
+        self._conn.send(self._memory.name)
+        return True
+
+    def _release_memory(self):
+        if self._memory is not None:
+            self._shared = None
+            self._memory.close()
+            self._memory.unlink()
+            self._memory = None
+
+    def read(self):
+        while True:
+            self._new_data.clear()
+            if self._shared is not None:
+                seq = int(self._shared.header[_SEQ])
+                if seq != self._last_seq and seq % 2 == 0:
+                    return True, self._snapshot()
+
+            alive = self._process.is_alive()
+            if alive and self._shared is not None:
+                self._new_data.wait(0.1)
+                continue
+
+            if not alive:
+                if self._process.exitcode == 0 or not self.restart:
+                    return False, None  # End of the video
+                self._restart()
+                time.sleep(1 / 30)
+            else:
+                # Restarted worker still starting up
+                self._connect(timeout=1 / 30)
+            # Keep the loop (and the DMX output) going meanwhile
+            return True, self._empty_frame()
+
+    def _snapshot(self):
+        shared = self._shared
+        while True:
+            seq = int(shared.header[_SEQ])
+            if seq % 2 == 1:
+                if not self._process.is_alive():
+                    return self._empty_frame()  # Died while writing
+                continue
+            hand_count = int(shared.header[_HAND_COUNT])
+            landmarks = shared.landmarks[:hand_count].copy()
+            handedness = shared.handedness[:hand_count].astype(int)
+            scores = shared.scores[:hand_count].copy()
+            capture_time = float(shared.header[_CAPTURE_TIME])
+            image = shared.frame.copy() if shared.frame is not None else self._image
+            if int(shared.header[_SEQ]) == seq:
+                break
+
+        self._last_seq = seq
+        if self._consumed is not None:
+            self._consumed.set()
+        self.capture_time = capture_time
+        if hand_count == 0:
+            results = ReplayResults(None, None)
+        else:
+            results = ReplayResults(list(landmarks), [
+                _handedness(index, score) for index, score in zip(handedness, scores)
+            ])
+        self._keep(results)
+        return image
+
+    def _empty_frame(self):
+        self.capture_time = time.perf_counter()
+        self._keep(ReplayResults(None, None))
+        return self._image
+
+    def _keep(self, results):
+        self._results[self._reads] = results
+        self._results.pop(self._reads - _KEPT_RESULTS, None)
+        self._reads += 1
+
+    def results(self, frame_id):
+        return self._results.get(frame_id, ReplayResults(None, None))
+
+    def _restart(self):
+        # At most one restart per second, a worker may crash on startup
+        if time.monotonic() - self._start_time < 1.0:
+            return
+        exitcode = self._process.exitcode
+        self._release_memory()
+        self.restarts += 1
+        if self.events is not None:
+            self.events.error("camera_worker_exited", camera=self.name, exitcode=exitcode,
+                              restarts=self.restarts)
+        else:
+            print(f"{self.name}: worker exited with code {exitcode}, restarting")
+        self._start()
+
+    def set(self, prop_id, value):
+        return False
+
+    def isOpened(self):
+        return self._process is not None and (self._process.is_alive() or self._shared is not None)
+
+    def release(self):
+        if self._process is not None:
+            self._stop_event.set()
+            self._process.join(timeout=2.0)
+            if self._process.is_alive():
+                self._process.terminate()
+                self._process.join()
+        self._release_memory()
+
+
+def _handedness(index, score):
+    return SimpleNamespace(classification=[
+        SimpleNamespace(index=int(index), score=float(score), label=HANDEDNESS_LABELS[index])
+    ])